@@ -0,0 +1,115 @@
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import User
+
+TOKEN_VERSION_CLAIM = 'token_version'
+REVOKED = -1
+
+
+def token_version_key(user_id):
+    return f'accounts:token_version:{user_id}'
+
+
+def current_token_version(user_id):
+    """The user's token version, or REVOKED for inactive or deleted users. Cached."""
+    key = token_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        row = User.objects.filter(pk=user_id).values_list('token_version', 'is_active').first()
+        version = row[0] if row and row[1] else REVOKED
+        cache.set(key, version)
+    return version
+
+
+async def acurrent_token_version(user_id):
+    """``current_token_version`` for async code; only a cache miss needs a thread."""
+    version = cache.get(token_version_key(user_id))
+    if version is None:
+        version = await sync_to_async(current_token_version)(user_id)
+    return version
+
+
+def add_claims(token, user):
+    """Sign everything the API needs to know about ``user`` into ``token``."""
+    token['username'] = user.username
+    token['role'] = user.role
+    token['base_id'] = user.base_id
+    token['is_superuser'] = user.is_superuser
+    token['is_staff'] = user.is_staff
+    token[TOKEN_VERSION_CLAIM] = user.token_version
+    return token
+
+
+def check_token_version(token):
+    if TOKEN_VERSION_CLAIM not in token:
+        raise InvalidToken('Token predates claim-based authentication; log in again.')
+    if token[TOKEN_VERSION_CLAIM] != current_token_version(token[api_settings.USER_ID_CLAIM]):
+        raise AuthenticationFailed('Token has been revoked.', code='token_revoked')
+
+
+async def acheck_token_version(token):
+    if TOKEN_VERSION_CLAIM not in token:
+        raise InvalidToken('Token predates claim-based authentication; log in again.')
+    if token[TOKEN_VERSION_CLAIM] != await acurrent_token_version(token[api_settings.USER_ID_CLAIM]):
+        raise AuthenticationFailed('Token has been revoked.', code='token_revoked')
+
+
+class ClaimsUser(TokenUser):
+    """
+    The request user, built from a verified access token's claims.
+
+    Exposes the same ``role``/``base_id``/``is_superuser`` attributes the
+    views read from ``User``; ``user`` loads the real row when one is needed.
+    """
+
+    ROLE_ADMIN = User.ROLE_ADMIN
+    ROLE_COMMANDER = User.ROLE_COMMANDER
+    ROLE_LOGISTICS = User.ROLE_LOGISTICS
+
+    def __str__(self):
+        return f"{self.username} ({self.role})"
+
+    @cached_property
+    def role(self):
+        return self.token.get('role', '')
+
+    @cached_property
+    def base_id(self):
+        return self.token.get('base_id')
+
+    @cached_property
+    def user(self):
+        return User.objects.get(pk=self.id)
+
+
+class ClaimsJWTAuthentication(JWTStatelessUserAuthentication):
+    """
+    JWT authentication that trusts the token's claims instead of loading the
+    user. Tokens are revoked by bumping ``User.token_version``, which is
+    checked against the cache (and the database only on a cache miss).
+    """
+
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+        check_token_version(validated_token)
+        return user
+
+    async def aauthenticate(self, request):
+        """``authenticate`` for async views, without leaving the event loop on a cache hit."""
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        user = super().get_user(validated_token)
+        await acheck_token_version(validated_token)
+        return user, validated_token
@@ -20,6 +20,9 @@ class User(AbstractUser):
         on_delete=models.SET_NULL,
         related_name='users'
     )
+    # Signed into every token; bumped whenever a claim would go stale so
+    # that outstanding tokens stop authenticating.
+    token_version = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return f"{self.username} ({self.role})"
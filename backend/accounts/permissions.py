@@ -1,31 +1,41 @@
 from rest_framework.permissions import BasePermission, SAFE_METHODS
 from .models import User
 
-def _has_role(user, roles):
-    return (
-        user and user.is_authenticated
-        and (user.is_superuser or user.role in roles)
-    )
+ALL_ROLES = (User.ROLE_ADMIN, User.ROLE_COMMANDER, User.ROLE_LOGISTICS)
 
-class IsAdmin(BasePermission):
-    def has_permission(self, request, view):
-        return _has_role(request.user, [User.ROLE_ADMIN])
 
-class IsAdminOrCommander(BasePermission):
-    def has_permission(self, request, view):
-        return _has_role(request.user, [User.ROLE_ADMIN, User.ROLE_COMMANDER])
+def roles_for(view_cls, method, action=None):
+    """
+    The roles ``view_cls`` admits for one request method (and viewset action).
 
-class IsAdminCommanderOrLogistics(BasePermission):
-    def has_permission(self, request, view):
-        return _has_role(
-            request.user,
-            [User.ROLE_ADMIN, User.ROLE_COMMANDER, User.ROLE_LOGISTICS],
-        )
+    Views declare this in one place: ``allowed_roles`` (default: every role),
+    ``write_roles`` for unsafe methods, and ``action_roles`` per action.
+    """
+    action_roles = getattr(view_cls, 'action_roles', {})
+    if action in action_roles:
+        return frozenset(action_roles[action])
+    write_roles = getattr(view_cls, 'write_roles', None)
+    if write_roles is not None and method not in SAFE_METHODS:
+        return frozenset(write_roles)
+    return frozenset(getattr(view_cls, 'allowed_roles', ALL_ROLES))
+
+
+class RoleRoutePermission(BasePermission):
+    """
+    Admits authenticated users whose role the route allows.
+
+    The roles come from ``request.route_roles``, looked up by
+    ``RoleBasedAccessMiddleware`` in its precompiled table, and are derived
+    from the view's declaration only for requests the table does not cover.
+    """
 
-class IsAdminOrReadOnly(BasePermission):
-    
     def has_permission(self, request, view):
         user = request.user
-        if request.method in SAFE_METHODS:
-            return bool(user and user.is_authenticated)
-        return _has_role(user, [User.ROLE_ADMIN])
+        if not (user and user.is_authenticated):
+            return False
+        if user.is_superuser:
+            return True
+        roles = getattr(request, 'route_roles', None)
+        if roles is None:
+            roles = roles_for(type(view), request.method, getattr(view, 'action', None))
+        return user.role in roles
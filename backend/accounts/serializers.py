@@ -1,4 +1,7 @@
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+
+from .authentication import add_claims, check_token_version
 from .models import User
 
 class UserSerializer(serializers.ModelSerializer):
@@ -15,3 +18,19 @@ class UserSerializer(serializers.ModelSerializer):
             user.set_password(password)
         user.save()
         return user
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Login: tokens carry role, base and token version as claims."""
+
+    @classmethod
+    def get_token(cls, user):
+        return add_claims(super().get_token(user), user)
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """Refresh: refuses refresh tokens issued before the user's claims changed."""
+
+    def validate(self, attrs):
+        check_token_version(self.token_class(attrs['refresh']))
+        return super().validate(attrs)
@@ -0,0 +1,40 @@
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .authentication import REVOKED, token_version_key
+from .models import User
+
+# Changing any of these revokes the user's outstanding tokens.
+TOKEN_FIELDS = ('role', 'base_id', 'is_superuser', 'is_staff', 'is_active', 'password')
+
+
+def _touches_token_fields(update_fields):
+    if update_fields is None:
+        return True
+    names = {User._meta.get_field(name).attname for name in update_fields}
+    return bool(names.intersection(TOKEN_FIELDS))
+
+
+@receiver(pre_save, sender=User)
+def bump_token_version(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._token_version_bumped = False
+    if raw or instance.pk is None or not _touches_token_fields(update_fields):
+        return
+    previous = User.objects.filter(pk=instance.pk).values(*TOKEN_FIELDS, 'token_version').first()
+    if previous and any(previous[field] != getattr(instance, field) for field in TOKEN_FIELDS):
+        instance.token_version = previous['token_version'] + 1
+        instance._token_version_bumped = True
+
+
+@receiver(post_save, sender=User)
+def cache_token_version(sender, instance, update_fields=None, **kwargs):
+    if getattr(instance, '_token_version_bumped', False) and update_fields is not None \
+            and 'token_version' not in update_fields:
+        User.objects.filter(pk=instance.pk).update(token_version=instance.token_version)
+    cache.set(token_version_key(instance.pk), instance.token_version if instance.is_active else REVOKED)
+
+
+@receiver(post_delete, sender=User)
+def revoke_tokens(sender, instance, **kwargs):
+    cache.set(token_version_key(instance.pk), REVOKED)
@@ -1,3 +1,88 @@
 from django.test import TestCase
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from assets.models import Base
+from config.middleware import compile_route_roles
+from .models import User
+from .permissions import ALL_ROLES
+
+
+class ClaimsAuthenticationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.base = Base.objects.create(name='Alpha', code='A')
+        cls.other = Base.objects.create(name='Bravo', code='B')
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            'cmdr', password='secret', role=User.ROLE_COMMANDER, base=self.base
+        )
+        self.client = APIClient()
+
+    def login(self):
+        response = self.client.post(
+            '/api/auth/login/', {'username': 'cmdr', 'password': 'secret'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def get_bases(self, access):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        return self.client.get('/api/bases/')
+
+    def test_requests_do_not_load_the_user(self):
+        access = self.login()['access']
+        self.get_bases(access)  # warm the reference cache
+        with self.assertNumQueries(0):
+            response = self.get_bases(access)
+        self.assertEqual(response.status_code, 200)
+
+    def test_claims_change_revokes_outstanding_tokens(self):
+        tokens = self.login()
+        self.user.base = self.other
+        self.user.save()
+
+        self.assertEqual(self.get_bases(tokens['access']).status_code, 401)
+        self.client.credentials()
+        response = self.client.post('/api/auth/refresh/', {'refresh': tokens['refresh']}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+        self.assertEqual(self.get_bases(self.login()['access']).status_code, 200)
+
+    def test_unrelated_updates_keep_tokens_valid(self):
+        access = self.login()['access']
+        self.user.email = 'cmdr@example.com'
+        self.user.save(update_fields=['email'])
+
+        self.assertEqual(self.get_bases(access).status_code, 200)
+
+
+class RoleRouteTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.base = Base.objects.create(name='Alpha', code='A')
+        cls.logistics = User.objects.create_user(
+            'logi', password='x', role=User.ROLE_LOGISTICS, base=cls.base
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.logistics)
+
+    def test_table_is_compiled_from_view_declarations(self):
+        route_roles = compile_route_roles()
+        self.assertEqual(route_roles[('base-list', 'GET')], frozenset(ALL_ROLES))
+        self.assertEqual(route_roles[('base-list', 'POST')], {User.ROLE_ADMIN})
+        self.assertEqual(route_roles[('assignment-list', 'GET')], {User.ROLE_ADMIN, User.ROLE_COMMANDER})
+        self.assertEqual(route_roles[('user-list', 'GET')], {User.ROLE_ADMIN})
+        self.assertEqual(route_roles[('user-detail', 'GET')], frozenset(ALL_ROLES))
+
+    def test_roles_are_enforced_per_route_and_method(self):
+        self.assertEqual(self.client.get('/api/bases/').status_code, 200)
+        self.assertEqual(self.client.post('/api/bases/', {'name': 'X', 'code': 'X'}).status_code, 403)
+        self.assertEqual(self.client.get('/api/assignments/').status_code, 403)
+        self.assertEqual(self.client.get('/api/purchases/').status_code, 200)
+        self.assertEqual(self.client.get('/api/users/').status_code, 403)
+        self.assertEqual(self.client.get(f'/api/users/{self.logistics.id}/').status_code, 200)
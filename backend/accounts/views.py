@@ -1,23 +1,20 @@
 from rest_framework import viewsets
-from rest_framework.permissions import IsAuthenticated
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
 from .models import User
 from .serializers import UserSerializer
-from .permissions import IsAdmin
 
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all().select_related('base')
     serializer_class = UserSerializer
-    permission_classes = [IsAuthenticated]
-
-    def get_permissions(self):
-        if self.action in ['list', 'create', 'destroy']:
-            return [IsAdmin()]
-        return super().get_permissions()
+    action_roles = {
+        'list': [User.ROLE_ADMIN],
+        'create': [User.ROLE_ADMIN],
+        'destroy': [User.ROLE_ADMIN],
+    }
 
     def get_queryset(self):
         user = self.request.user
-        if user.is_superuser or user.role == user.ROLE_ADMIN:
+        if user.is_superuser or user.role == User.ROLE_ADMIN:
             return super().get_queryset()
         return User.objects.filter(id=user.id)
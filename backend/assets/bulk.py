@@ -0,0 +1,56 @@
+from django.db import connection
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from config.sqlite import write_transaction
+from logs.writer import build_entry, deferred, enqueue
+from . import versions
+from .inventory import apply_entries, movement_entries, stock_checked
+
+
+class BulkCreateMixin:
+    """
+    Adds ``POST <list>/bulk/`` taking a JSON list of objects.
+
+    Every row is validated with the viewset's serializer and checked with
+    ``check_create_allowed`` before anything is written. Rows, ledger
+    updates and TransactionLog entries are then written in batches inside
+    one transaction, the log entries just before it commits, so an import
+    either lands completely or not at all, and is refused as a whole if it
+    would take any balance below zero.
+    """
+
+    bulk_max_rows = 5000
+    bulk_batch_size = 500
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request, *args, **kwargs):
+        if not isinstance(request.data, list):
+            raise ValidationError({'detail': 'Expected a list of objects.'})
+        if len(request.data) > self.bulk_max_rows:
+            raise ValidationError({'detail': f'At most {self.bulk_max_rows} rows per request.'})
+
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        for data in serializer.validated_data:
+            self.check_create_allowed(data)
+
+        model = serializer.child.Meta.model
+        objs = [model(**data, created_by_id=request.user.id) for data in serializer.validated_data]
+
+        with write_transaction(), stock_checked(), deferred():
+            if connection.features.can_return_rows_from_bulk_insert:
+                model.objects.bulk_create(objs, batch_size=self.bulk_batch_size)
+                entries = [entry for obj in objs for entry in movement_entries(obj)]
+                apply_entries(entries)
+                versions.bump_on_commit(*{base_id for base_id, *_ in entries})
+                enqueue(*[build_entry(obj) for obj in objs])
+            else:
+                # Without RETURNING the new ids are unknown, so let the
+                # per-row signals maintain the ledger and the audit log.
+                for obj in objs:
+                    obj.save()
+
+        return Response(self.get_serializer(objs, many=True).data, status=status.HTTP_201_CREATED)
@@ -0,0 +1,92 @@
+"""
+Rendered DashboardView responses, cached per base change version.
+
+An entry's key includes the base's current version from ``assets.versions``,
+so any committed movement touching the base makes its old entries
+unreachable; they simply age out. Hit and miss counts are kept in the same
+cache so every worker sharing it reports the same totals (approximate with
+the file backend, whose ``incr`` is not atomic).
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+
+from config import metrics
+
+from . import versions
+
+COUNTERS = ('hits', 'misses')
+
+
+def _cache():
+    return caches[getattr(settings, 'DASHBOARD_CACHE_ALIAS', 'default')]
+
+
+def _count(name):
+    metrics.count_cache('dashboard', name == 'hits')
+    cache = _cache()
+    key = f'dashboard:stats:{name}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+
+def _key(base_id, parts):
+    digest = hashlib.md5(repr((versions.current([base_id]), parts)).encode()).hexdigest()
+    return f'dashboard:{base_id}:{digest}'
+
+
+def fetch(base_id, parts, compute):
+    """The cached response data for ``parts`` on ``base_id``, computing it on a miss."""
+    timeout = getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 3600)
+    if not timeout:
+        return compute()
+
+    cache = _cache()
+    key = _key(base_id, parts)
+    data = cache.get(key)
+    if data is not None:
+        _count('hits')
+        return data
+
+    _count('misses')
+    data = compute()
+    cache.set(key, data, timeout)
+    return data
+
+
+async def afetch(base_id, parts, compute):
+    """``fetch`` for async views; ``compute`` is a coroutine function."""
+    timeout = getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 3600)
+    if not timeout:
+        return await compute()
+
+    cache = _cache()
+    key = _key(base_id, parts)
+    data = cache.get(key)
+    if data is not None:
+        _count('hits')
+        return data
+
+    _count('misses')
+    data = await compute()
+    cache.set(key, data, timeout)
+    return data
+
+
+def stats():
+    counts = _cache().get_many([f'dashboard:stats:{name}' for name in COUNTERS])
+    hits, misses = (counts.get(f'dashboard:stats:{name}', 0) for name in COUNTERS)
+    return {
+        'alias': getattr(settings, 'DASHBOARD_CACHE_ALIAS', 'default'),
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / (hits + misses), 4) if hits + misses else None,
+    }
+
+
+def reset_stats():
+    _cache().delete_many([f'dashboard:stats:{name}' for name in COUNTERS])
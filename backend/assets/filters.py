@@ -0,0 +1,97 @@
+from datetime import datetime, time, timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+
+from accounts.models import User
+
+
+def _parse(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        parsed = parse_date(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValidationError({name: "Expected a date in YYYY-MM-DD format."})
+    return parsed
+
+
+def parse_id(params, name):
+    """The integer id in query param ``name``, or None when it is absent."""
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValidationError({name: "Expected an integer id."})
+
+
+def parse_date_range(params, default_end=None):
+    """``start_date``/``end_date`` query params as dates (either may be None)."""
+    return _parse(params, 'start_date'), _parse(params, 'end_date') or default_end
+
+
+def day_start(day):
+    """Midnight at the start of ``day`` in the configured time zone."""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def date_range_q(field, start_date=None, end_date=None):
+    """
+    Half-open ``[start 00:00, end+1 00:00)`` timestamp range on ``field``.
+
+    Comparing the raw column (rather than ``field__date``) lets the database
+    use the timestamp indexes.
+    """
+    q = Q()
+    if start_date:
+        q &= Q(**{f'{field}__gte': day_start(start_date)})
+    if end_date:
+        q &= Q(**{f'{field}__lt': day_start(end_date + timedelta(days=1))})
+    return q
+
+
+def before_q(field, start_date):
+    """Timestamps strictly before ``start_date`` 00:00."""
+    return Q(**{f'{field}__lt': day_start(start_date)})
+
+
+class MovementFilter:
+    """Role scoping and the shared list query params for one movement model."""
+
+    def __init__(self, date_field, base_fields=('base',)):
+        self.date_field = date_field
+        self.base_fields = base_fields
+
+    def involving(self, base_id):
+        q = Q()
+        for field in self.base_fields:
+            q |= Q(**{f'{field}_id': base_id})
+        return q
+
+    def filter_queryset(self, qs, user, params):
+        if user.is_superuser or user.role == User.ROLE_ADMIN:
+            pass
+        elif user.base_id:
+            qs = qs.filter(self.involving(user.base_id))
+        else:
+            return qs.none()
+
+        base_id = parse_id(params, 'base_id')
+        eq_id = parse_id(params, 'equipment_type_id')
+        start_date, end_date = parse_date_range(params)
+
+        if base_id:
+            qs = qs.filter(self.involving(base_id))
+        if eq_id:
+            qs = qs.filter(equipment_type_id=eq_id)
+        if start_date or end_date:
+            qs = qs.filter(date_range_q(self.date_field, start_date, end_date))
+
+        return qs
@@ -0,0 +1,496 @@
+import asyncio
+import contextvars
+from collections import defaultdict
+from contextlib import contextmanager
+from itertools import accumulate
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connections, transaction
+from django.db.models import DateField, F, Q, Sum
+from django.db.models.functions import TruncDate, TruncDay, TruncMonth, TruncWeek
+from django.db.models.lookups import GreaterThanOrEqual
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .filters import before_q, date_range_q
+from .models import (
+    Purchase, Transfer, Assignment, Expenditure,
+    InventoryLedger, InventoryBalance,
+)
+
+BUCKETS = ('purchases', 'transfers_in', 'transfers_out', 'assigned', 'expended')
+
+# How each bucket moves the on-hand quantity.
+ON_HAND_SIGNS = {'purchases': 1, 'transfers_in': 1, 'transfers_out': -1, 'assigned': -1, 'expended': -1}
+ON_HAND = F('purchases') + F('transfers_in') - F('transfers_out') - F('assigned') - F('expended')
+
+TREND_INTERVALS = {
+    'day': TruncDay,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+# model -> (timestamp field, ((base field, bucket), ...))
+MOVEMENT_SOURCES = {
+    Purchase: ('purchased_at', (('base_id', 'purchases'),)),
+    Transfer: ('transfer_at', (('to_base_id', 'transfers_in'), ('from_base_id', 'transfers_out'))),
+    Assignment: ('assigned_at', (('base_id', 'assigned'),)),
+    Expenditure: ('expended_at', (('base_id', 'expended'),)),
+}
+
+
+def _day(value):
+    if timezone.is_aware(value):
+        return timezone.localdate(value)
+    return value.date()
+
+
+def movement_entries(instance):
+    """(base_id, equipment_type_id, day, bucket, quantity) rows for a movement."""
+    date_field, targets = MOVEMENT_SOURCES[type(instance)]
+    day = _day(getattr(instance, date_field))
+    return [
+        (getattr(instance, base_field), instance.equipment_type_id, day, bucket, instance.quantity)
+        for base_field, bucket in targets
+    ]
+
+
+def _increment(model, lookup, deltas):
+    changes = {bucket: F(bucket) + delta for bucket, delta in deltas.items() if delta}
+    if not changes:
+        return
+    if model.objects.filter(**lookup).update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **deltas)
+    except IntegrityError:
+        # Another writer created the row first.
+        model.objects.filter(**lookup).update(**changes)
+
+
+_stock_checked = contextvars.ContextVar('stock_checked', default=False)
+
+
+class InsufficientStock(ValidationError):
+
+    def __init__(self, base_id, equipment_type_id, requested):
+        available = (
+            InventoryBalance.objects
+            .filter(base_id=base_id, equipment_type_id=equipment_type_id)
+            .values_list(ON_HAND, flat=True)
+            .first()
+        ) or 0
+        super().__init__({'quantity': [
+            f"Only {max(available, 0)} of equipment type {equipment_type_id} on hand at "
+            f"base {base_id}; {requested} requested."
+        ]})
+
+
+@contextmanager
+def stock_checked():
+    """Make ledger updates in this block refuse to take a balance below zero."""
+    token = _stock_checked.set(True)
+    try:
+        yield
+    finally:
+        _stock_checked.reset(token)
+
+
+def _withdraw(lookup, deltas, quantity):
+    """
+    Apply ``deltas`` to the balance row only if it holds ``quantity`` on hand.
+
+    The check and the update are one UPDATE, so the row lock it takes makes it
+    a compare-and-swap: a concurrent withdrawal either commits first, and this
+    one sees its result, or waits for this one.
+    """
+    changes = {bucket: F(bucket) + delta for bucket, delta in deltas.items() if delta}
+    updated = (
+        InventoryBalance.objects
+        .filter(GreaterThanOrEqual(ON_HAND, quantity), **lookup)
+        .update(**changes)
+    )
+    if not updated:
+        raise InsufficientStock(lookup['base_id'], lookup['equipment_type_id'], quantity)
+
+
+def apply_entries(entries, sign=1):
+    """
+    Add (sign=1) or remove (sign=-1) movement entries from the ledger.
+
+    Inside ``stock_checked()``, balances the entries lower are withdrawn
+    with ``_withdraw``.
+    """
+    days = defaultdict(lambda: defaultdict(int))
+    balances = defaultdict(lambda: defaultdict(int))
+    for base_id, equipment_type_id, day, bucket, quantity in entries:
+        days[(base_id, equipment_type_id, day)][bucket] += sign * quantity
+        balances[(base_id, equipment_type_id)][bucket] += sign * quantity
+
+    check = _stock_checked.get()
+    with transaction.atomic(savepoint=False):
+        # In key order, so writers touching the same rows lock them in the same order.
+        for (base_id, equipment_type_id), deltas in sorted(balances.items()):
+            lookup = {'base_id': base_id, 'equipment_type_id': equipment_type_id}
+            change = sum(ON_HAND_SIGNS[bucket] * delta for bucket, delta in deltas.items())
+            if check and change < 0:
+                _withdraw(lookup, deltas, -change)
+            else:
+                _increment(InventoryBalance, lookup, deltas)
+        for (base_id, equipment_type_id, day), deltas in days.items():
+            _increment(
+                InventoryLedger,
+                {'base_id': base_id, 'equipment_type_id': equipment_type_id, 'day': day},
+                deltas,
+            )
+
+
+def rebuild_ledger():
+    """Recompute the ledger and balances from the movement tables."""
+    days = defaultdict(lambda: dict.fromkeys(BUCKETS, 0))
+    for model, (date_field, targets) in MOVEMENT_SOURCES.items():
+        for base_field, bucket in targets:
+            rows = (
+                model.objects
+                .annotate(day=TruncDate(date_field))
+                .values_list(base_field, 'equipment_type_id', 'day')
+                .annotate(total=Sum('quantity'))
+                .order_by()
+            )
+            for base_id, equipment_type_id, day, total in rows:
+                days[(base_id, equipment_type_id, day)][bucket] += total
+
+    balances = defaultdict(lambda: dict.fromkeys(BUCKETS, 0))
+    for (base_id, equipment_type_id, _), totals in days.items():
+        for bucket, total in totals.items():
+            balances[(base_id, equipment_type_id)][bucket] += total
+
+    with transaction.atomic():
+        InventoryLedger.objects.all().delete()
+        InventoryBalance.objects.all().delete()
+        InventoryLedger.objects.bulk_create(
+            [
+                InventoryLedger(base_id=b, equipment_type_id=e, day=d, **totals)
+                for (b, e, d), totals in days.items()
+            ],
+            batch_size=1000,
+        )
+        InventoryBalance.objects.bulk_create(
+            [
+                InventoryBalance(base_id=b, equipment_type_id=e, **totals)
+                for (b, e), totals in balances.items()
+            ],
+            batch_size=1000,
+        )
+    return len(days)
+
+
+def _ledger_statements(base_id, equipment_type_id, start_date, end_date):
+    pair = {'base_id': base_id, 'equipment_type_id': equipment_type_id}
+    # The balance row is unique per pair, so summing it just reads it.
+    balance = (InventoryBalance.objects.filter(**pair), {b: Sum(b) for b in BUCKETS})
+    if start_date:
+        tail = (
+            InventoryLedger.objects.filter(**pair, day__gte=start_date),
+            {
+                **{f'{b}_tail': Sum(b) for b in BUCKETS},
+                **{f'{b}_range': Sum(b, filter=Q(day__lte=end_date)) for b in BUCKETS},
+            },
+        )
+    else:
+        tail = (
+            InventoryLedger.objects.filter(**pair, day__gt=end_date),
+            {b: Sum(b) for b in BUCKETS},
+        )
+    return [balance, tail]
+
+
+def _ledger_result(start_date, rows):
+    balance, tail = rows
+    totals = {b: balance[b] or 0 for b in BUCKETS}
+    if start_date:
+        before = {b: totals[b] - (tail[f'{b}_tail'] or 0) for b in BUCKETS}
+        in_range = {b: tail[f'{b}_range'] or 0 for b in BUCKETS}
+    else:
+        before = dict.fromkeys(BUCKETS, 0)
+        in_range = {b: totals[b] - (tail[b] or 0) for b in BUCKETS}
+    return {'before': before, 'in_range': in_range}
+
+
+def ledger_totals(base_id, equipment_type_id, start_date, end_date):
+    """
+    Movement totals before ``start_date`` and within [start_date, end_date].
+
+    Reads the all-time balance row and only the ledger days from the start
+    of the range onwards, so the cost does not grow with history.
+    """
+    statements = _ledger_statements(base_id, equipment_type_id, start_date, end_date)
+    return _ledger_result(start_date, _aggregate(statements))
+
+
+def _movement_statements(base_id, equipment_type_id, start_date, end_date):
+    statements = []
+    for model, (date_field, targets) in MOVEMENT_SOURCES.items():
+        involved = Q()
+        aggregates = {}
+        for base_field, bucket in targets:
+            mine = Q(**{base_field: base_id})
+            involved |= mine
+            if start_date:
+                aggregates[f'{bucket}_before'] = Sum(
+                    'quantity', filter=mine & before_q(date_field, start_date)
+                )
+                aggregates[f'{bucket}_range'] = Sum(
+                    'quantity', filter=mine & date_range_q(date_field, start_date)
+                )
+            else:
+                aggregates[f'{bucket}_range'] = Sum('quantity', filter=mine)
+
+        statements.append((
+            model.objects.filter(
+                involved,
+                date_range_q(date_field, end_date=end_date),
+                equipment_type_id=equipment_type_id,
+            ),
+            aggregates,
+        ))
+    return statements
+
+
+def _movement_result(start_date, rows):
+    before = dict.fromkeys(BUCKETS, 0)
+    in_range = dict.fromkeys(BUCKETS, 0)
+    for (_, targets), row in zip(MOVEMENT_SOURCES.values(), rows):
+        for _, bucket in targets:
+            before[bucket] = row.get(f'{bucket}_before') or 0
+            in_range[bucket] = row[f'{bucket}_range'] or 0
+    return {'before': before, 'in_range': in_range}
+
+
+def movement_totals(base_id, equipment_type_id, start_date, end_date):
+    """
+    Same result as ``ledger_totals``, computed from the movement tables.
+
+    Every bucket of a table is a conditional ``Sum`` over the date boundary,
+    so this is one statement per movement table whatever the filters.
+    """
+    statements = _movement_statements(base_id, equipment_type_id, start_date, end_date)
+    return _movement_result(start_date, _aggregate(statements))
+
+
+def _aggregate(statements):
+    return [queryset.aggregate(**aggregates) for queryset, aggregates in statements]
+
+
+def _aggregate_on_own_connection(queryset, aggregates):
+    try:
+        return queryset.aggregate(**aggregates)
+    finally:
+        # Worker threads get no request_finished signal to recycle connections.
+        connections[queryset.db].close_if_unusable_or_obsolete()
+
+
+def parallel_reads(using=DEFAULT_DB_ALIAS):
+    """
+    Whether independent reads may run at once on separate connections.
+
+    ASYNC_PARALLEL_READS overrides; by default only server databases do,
+    since SQLite readers share one file and a test database's uncommitted
+    rows are invisible to other connections.
+    """
+    setting = getattr(settings, 'ASYNC_PARALLEL_READS', None)
+    if setting is not None:
+        return setting
+    return connections[using].vendor != 'sqlite'
+
+
+async def _aaggregate(statements):
+    """
+    ``_aggregate`` with the async ORM, all statements in flight together.
+
+    ``aaggregate`` runs every query on the request's one sync thread, so on
+    SQLite they still queue; with ``parallel_reads()`` each goes to a pool
+    thread with its own connection and the database runs them concurrently.
+    """
+    if statements and parallel_reads(statements[0][0].db):
+        run = sync_to_async(_aggregate_on_own_connection, thread_sensitive=False)
+        return await asyncio.gather(*(run(qs, aggregates) for qs, aggregates in statements))
+    return await asyncio.gather(*(qs.aaggregate(**aggregates) for qs, aggregates in statements))
+
+
+def dashboard_totals(base_id, equipment_type_id, start_date, end_date):
+    if getattr(settings, 'INVENTORY_LEDGER_ENABLED', True):
+        return ledger_totals(base_id, equipment_type_id, start_date, end_date)
+    return movement_totals(base_id, equipment_type_id, start_date, end_date)
+
+
+async def adashboard_totals(base_id, equipment_type_id, start_date, end_date):
+    """``dashboard_totals`` for async views."""
+    if getattr(settings, 'INVENTORY_LEDGER_ENABLED', True):
+        statements = _ledger_statements(base_id, equipment_type_id, start_date, end_date)
+        return _ledger_result(start_date, await _aaggregate(statements))
+    statements = _movement_statements(base_id, equipment_type_id, start_date, end_date)
+    return _movement_result(start_date, await _aaggregate(statements))
+
+
+def _pair_totals(rows):
+    return {
+        (row.pop('base_id'), row.pop('equipment_type_id')): row
+        for row in rows
+    }
+
+
+def ledger_matrix(base_ids, equipment_type_id, start_date, end_date):
+    """
+    ``ledger_totals`` for every (base, equipment_type) pair at once.
+
+    ``base_ids`` of None means every base. Returns {(base_id, equipment_type_id): totals}.
+    """
+    pair_filter = Q()
+    if base_ids is not None:
+        pair_filter &= Q(base_id__in=base_ids)
+    if equipment_type_id:
+        pair_filter &= Q(equipment_type_id=equipment_type_id)
+
+    totals = _pair_totals(
+        InventoryBalance.objects.filter(pair_filter).values('base_id', 'equipment_type_id', *BUCKETS)
+    )
+    grouped = (
+        InventoryLedger.objects
+        .filter(pair_filter)
+        .values('base_id', 'equipment_type_id')
+        .order_by()
+    )
+    if start_date:
+        tails = _pair_totals(
+            grouped.filter(day__gte=start_date).annotate(
+                **{f'{b}_tail': Sum(b) for b in BUCKETS},
+                **{f'{b}_range': Sum(b, filter=Q(day__lte=end_date)) for b in BUCKETS},
+            )
+        )
+    else:
+        tails = _pair_totals(
+            grouped.filter(day__gt=end_date).annotate(**{f'{b}_after': Sum(b) for b in BUCKETS})
+        )
+
+    matrix = {}
+    for pair, total in totals.items():
+        tail = tails.get(pair, {})
+        if start_date:
+            before = {b: total[b] - (tail.get(f'{b}_tail') or 0) for b in BUCKETS}
+            in_range = {b: tail.get(f'{b}_range') or 0 for b in BUCKETS}
+        else:
+            before = dict.fromkeys(BUCKETS, 0)
+            in_range = {b: total[b] - (tail.get(f'{b}_after') or 0) for b in BUCKETS}
+        matrix[pair] = {'before': before, 'in_range': in_range}
+    return matrix
+
+
+def movement_matrix(base_ids, equipment_type_id, start_date, end_date):
+    """``ledger_matrix`` computed from the movement tables, one grouped query per bucket."""
+    matrix = defaultdict(lambda: {
+        'before': dict.fromkeys(BUCKETS, 0),
+        'in_range': dict.fromkeys(BUCKETS, 0),
+    })
+
+    for model, (date_field, targets) in MOVEMENT_SOURCES.items():
+        qs = model.objects.filter(date_range_q(date_field, end_date=end_date))
+        if equipment_type_id:
+            qs = qs.filter(equipment_type_id=equipment_type_id)
+
+        aggregates = {'in_range': Sum('quantity')}
+        if start_date:
+            aggregates = {
+                'before': Sum('quantity', filter=before_q(date_field, start_date)),
+                'in_range': Sum('quantity', filter=date_range_q(date_field, start_date)),
+            }
+
+        for base_field, bucket in targets:
+            rows = qs
+            if base_ids is not None:
+                rows = rows.filter(**{f'{base_field}__in': base_ids})
+            rows = rows.values(base_field, 'equipment_type_id').annotate(**aggregates).order_by()
+            for row in rows:
+                totals = matrix[(row[base_field], row['equipment_type_id'])]
+                totals['before'][bucket] = row.get('before') or 0
+                totals['in_range'][bucket] = row['in_range'] or 0
+
+    return dict(matrix)
+
+
+def dashboard_matrix(base_ids, equipment_type_id, start_date, end_date):
+    if getattr(settings, 'INVENTORY_LEDGER_ENABLED', True):
+        return ledger_matrix(base_ids, equipment_type_id, start_date, end_date)
+    return movement_matrix(base_ids, equipment_type_id, start_date, end_date)
+
+
+def ledger_trend(base_id, equipment_type_id, start_date, end_date, interval):
+    """Per-period movement totals within [start_date, end_date], oldest first."""
+    rows = InventoryLedger.objects.filter(
+        base_id=base_id, equipment_type_id=equipment_type_id, day__lte=end_date,
+    )
+    if start_date:
+        rows = rows.filter(day__gte=start_date)
+    rows = (
+        rows.annotate(period=TREND_INTERVALS[interval]('day'))
+        .values('period')
+        .annotate(**{b: Sum(b) for b in BUCKETS})
+        .order_by('period')
+    )
+    return [(row.pop('period'), row) for row in rows]
+
+
+def movement_trend(base_id, equipment_type_id, start_date, end_date, interval):
+    """``ledger_trend`` computed from the movement tables, one statement per table."""
+    periods = defaultdict(lambda: dict.fromkeys(BUCKETS, 0))
+
+    for model, (date_field, targets) in MOVEMENT_SOURCES.items():
+        involved = Q()
+        aggregates = {}
+        for base_field, bucket in targets:
+            mine = Q(**{base_field: base_id})
+            involved |= mine
+            aggregates[bucket] = Sum('quantity', filter=mine)
+
+        rows = model.objects.filter(
+            involved,
+            date_range_q(date_field, start_date, end_date),
+            equipment_type_id=equipment_type_id,
+        )
+        rows = (
+            rows.annotate(period=TREND_INTERVALS[interval](date_field, output_field=DateField()))
+            .values('period')
+            .annotate(**aggregates)
+            .order_by()
+        )
+        for row in rows:
+            for _, bucket in targets:
+                periods[row['period']][bucket] += row[bucket] or 0
+
+    return sorted(periods.items())
+
+
+def dashboard_trend(base_id, equipment_type_id, start_date, end_date, interval):
+    if getattr(settings, 'INVENTORY_LEDGER_ENABLED', True):
+        return ledger_trend(base_id, equipment_type_id, start_date, end_date, interval)
+    return movement_trend(base_id, equipment_type_id, start_date, end_date, interval)
+
+
+def running_balances(opening_balance, periods, hide_usage=False):
+    """Closing balance after each period, as one cumulative sum over the period nets."""
+    usage = 0 if hide_usage else 1
+    nets = (
+        b['purchases'] + b['transfers_in'] - b['transfers_out']
+        - usage * (b['assigned'] + b['expended'])
+        for _, b in periods
+    )
+    return list(accumulate(nets, initial=opening_balance))[1:]
+
+
+def balance_of(buckets):
+    return (
+        buckets['purchases'] + buckets['transfers_in'] - buckets['transfers_out']
+        - buckets['assigned'] - buckets['expended']
+    )
@@ -0,0 +1,190 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import override_settings
+
+from accounts.models import User
+from accounts.serializers import ClaimsTokenObtainPairSerializer
+from assets.inventory import rebuild_ledger
+from assets.synthetic import create_reference_data, generate_logs, generate_movements
+
+# label -> (dashboard url, logs url, settings overrides)
+PATHS = {
+    'wsgi (sync views)': ('/api/dashboard/', '/api/logs/', {}),
+    'asgi (async views)': ('/api/async/dashboard/', '/api/async/logs/', {'ASYNC_PARALLEL_READS': False}),
+    'asgi, parallel reads': ('/api/async/dashboard/', '/api/async/logs/', {'ASYNC_PARALLEL_READS': True}),
+}
+
+
+def percentile(values, pct):
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method='inclusive')[pct - 1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare tail latency of the dashboard and log list under concurrent load "
+        "through the sync views on Django's WSGI handler and the async views on its "
+        "ASGI handler, in-process against a scratch SQLite file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=32, help='Clients in flight at once.')
+        parser.add_argument('--requests', type=int, default=2000, help='Requests per path.')
+        parser.add_argument('--rows', type=int, default=200_000, help='Synthetic movement rows.')
+        parser.add_argument(
+            '--movement-tables', action='store_true',
+            help='Aggregate the movement tables (four statements) instead of the ledger (two).',
+        )
+        parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        if options['worker']:
+            return self.run_worker(options)
+
+        with tempfile.TemporaryDirectory() as scratch:
+            env = {
+                **os.environ,
+                'DATABASE_URL': f'sqlite:///{Path(scratch) / "bench.sqlite3"}',
+                'DASHBOARD_CACHE_TIMEOUT': '0',
+                'INVENTORY_LEDGER_ENABLED': '0' if options['movement_tables'] else '1',
+            }
+            env.pop('DATABASE_REPLICA_URL', None)
+            output = subprocess.run(
+                [sys.executable, str(settings.BASE_DIR / 'manage.py'), 'benchmark_async_views', '--worker',
+                 '--concurrency', str(options['concurrency']), '--requests', str(options['requests']),
+                 '--rows', str(options['rows'])],
+                env=env, capture_output=True, text=True, check=True,
+            ).stdout
+        self.report(json.loads(output.strip().splitlines()[-1]), options)
+
+    def report(self, results, options):
+        self.stdout.write(
+            f"{options['requests']} requests per path, {options['concurrency']} concurrent, "
+            f"totals from the {'movement tables' if options['movement_tables'] else 'ledger'}"
+        )
+        for label, result in results.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{label}: {result['throughput']:.1f} req/s"))
+            for kind in ('dashboard', 'logs'):
+                latency = result[kind]
+                self.stdout.write(
+                    f"  {kind:9}  p50 {percentile(latency, 50):7.2f} ms  p95 {percentile(latency, 95):7.2f} ms  "
+                    f"p99 {percentile(latency, 99):7.2f} ms  max {max(latency):7.2f} ms"
+                )
+
+    def run_worker(self, options):
+        call_command('migrate', verbosity=0)
+        base_ids, equipment_ids = create_reference_data(20, 50)
+        generate_movements(base_ids, equipment_ids, options['rows'])
+        generate_logs()
+        rebuild_ledger()
+        admin = User.objects.create_user('bench', password='x', role=User.ROLE_ADMIN)
+        token = str(ClaimsTokenObtainPairSerializer.get_token(admin).access_token)
+        connection.close()
+
+        rnd = random.Random(0)
+        plan = [
+            (kind, {'base_id': rnd.choice(base_ids), 'equipment_type_id': rnd.choice(equipment_ids)})
+            for kind in ('dashboard', 'logs') * (options['requests'] // 2)
+        ]
+        results = {}
+        with override_settings(ALLOWED_HOSTS=['*']):
+            for label, (dashboard_url, logs_url, overrides) in PATHS.items():
+                urls = {'dashboard': dashboard_url, 'logs': logs_url}
+                requests = [(kind, urls[kind], params) for kind, params in plan]
+                with override_settings(**overrides):
+                    if label.startswith('wsgi'):
+                        results[label] = self.run_wsgi(requests, token, options['concurrency'])
+                    else:
+                        results[label] = asyncio.run(self.run_asgi(requests, token, options['concurrency']))
+        self.stdout.write(json.dumps(results))
+
+    def run_wsgi(self, requests, token, concurrency):
+        """Each client is a thread calling the WSGI handler, as a threaded WSGI server would."""
+        handler = get_wsgi_application()
+        factory = RequestFactory(HTTP_AUTHORIZATION=f'Bearer {token}')
+        latency = {'dashboard': [], 'logs': []}
+
+        def client(share):
+            try:
+                for kind, url, params in share:
+                    environ = factory.get(url, params).environ
+                    began = time.perf_counter()
+                    response = handler(environ, lambda status, headers: None)
+                    body = b''.join(response)
+                    response.close()
+                    elapsed = (time.perf_counter() - began) * 1000
+                    if response.status_code != 200:
+                        raise RuntimeError(f'{url}: {response.status_code} {body[:200]}')
+                    latency[kind].append(elapsed)
+            finally:
+                connection.close()
+
+        began = time.perf_counter()
+        threads = [threading.Thread(target=client, args=(requests[i::concurrency],)) for i in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return {**latency, 'throughput': len(requests) / (time.perf_counter() - began)}
+
+    async def run_asgi(self, requests, token, concurrency):
+        """Each client is a task on one event loop calling the ASGI handler, as an ASGI server would."""
+        app = get_asgi_application()
+        headers = [(b'host', b'localhost'), (b'authorization', f'Bearer {token}'.encode())]
+        latency = {'dashboard': [], 'logs': []}
+
+        async def call(url, params):
+            sent, response = False, {}
+
+            async def receive():
+                nonlocal sent
+                if sent:
+                    # No disconnect: wait until the handler stops listening.
+                    await asyncio.Future()
+                sent = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    response['status'] = message['status']
+                elif message['type'] == 'http.response.body':
+                    response['body'] = response.get('body', b'') + message.get('body', b'')
+
+            await app({
+                'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+                'method': 'GET', 'scheme': 'http', 'path': url, 'raw_path': url.encode(),
+                'query_string': urlencode(params).encode(), 'root_path': '',
+                'headers': headers, 'server': ('localhost', 80), 'client': ('127.0.0.1', 0),
+            }, receive, send)
+            if response['status'] != 200:
+                raise RuntimeError(f"{url}: {response['status']} {response['body'][:200]}")
+
+        async def client(share):
+            for kind, url, params in share:
+                began = time.perf_counter()
+                await call(url, params)
+                latency[kind].append((time.perf_counter() - began) * 1000)
+
+        began = time.perf_counter()
+        await asyncio.gather(*(client(requests[i::concurrency]) for i in range(concurrency)))
+        return {**latency, 'throughput': len(requests) / (time.perf_counter() - began)}
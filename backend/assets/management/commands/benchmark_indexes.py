@@ -0,0 +1,102 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Sum
+from django.utils import timezone
+
+from assets.filters import MovementFilter, before_q, date_range_q
+from assets.models import Purchase, Transfer, Assignment, Expenditure
+from assets.synthetic import create_reference_data, generate_movements
+
+INDEXED_MODELS = (Purchase, Transfer, Assignment, Expenditure)
+
+
+def access_paths(base_id, equipment_type_id, start, end):
+    """The movement queries the viewsets and the dashboard issue, by label."""
+    scoped = {'equipment_type_id': equipment_type_id}
+    return [
+        ('purchases base+equipment+range', Purchase.objects.filter(
+            date_range_q('purchased_at', start, end), base_id=base_id, **scoped)),
+        ('transfers out base+equipment+range', Transfer.objects.filter(
+            date_range_q('transfer_at', start, end), from_base_id=base_id, **scoped)),
+        ('transfers in base+equipment+range', Transfer.objects.filter(
+            date_range_q('transfer_at', start, end), to_base_id=base_id, **scoped)),
+        ('transfers either direction (list)', Transfer.objects.filter(
+            MovementFilter('transfer_at', ('from_base', 'to_base')).involving(base_id),
+            date_range_q('transfer_at', start, end), **scoped)),
+        ('assignments base+equipment+range', Assignment.objects.filter(
+            date_range_q('assigned_at', start, end), base_id=base_id, **scoped)),
+        ('expenditures base+equipment+range', Expenditure.objects.filter(
+            date_range_q('expended_at', start, end), base_id=base_id, **scoped)),
+        ('purchases before start', Purchase.objects.filter(
+            before_q('purchased_at', start), base_id=base_id, **scoped)),
+        ('purchases all bases, range', Purchase.objects.filter(
+            date_range_q('purchased_at', start, end))),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Load synthetic movements into a scratch database and compare query plans and "
+        "timings of the movement access paths with and without the composite indexes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=2_000_000, help='Total movement rows.')
+        parser.add_argument('--bases', type=int, default=40)
+        parser.add_argument('--equipment-types', type=int, default=300)
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per query.')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def run(self, options):
+        self.stdout.write(f"Generating {options['rows']:,} movement rows...")
+        base_ids, equipment_ids = create_reference_data(options['bases'], options['equipment_types'])
+        generate_movements(base_ids, equipment_ids, options['rows'], seed=options['seed'])
+
+        end = timezone.localdate()
+        paths = access_paths(base_ids[0], equipment_ids[0], end - timedelta(days=90), end)
+
+        self.set_indexes(add=False)
+        without = self.measure(paths, options['repeat'])
+        self.set_indexes(add=True)
+        with_indexes = self.measure(paths, options['repeat'])
+
+        for label, _ in paths:
+            (before_ms, before_plan), (after_ms, after_plan) = without[label], with_indexes[label]
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            self.stdout.write(f"  without indexes: {before_ms:9.2f} ms  {before_plan}")
+            self.stdout.write(f"  with indexes:    {after_ms:9.2f} ms  {after_plan}")
+
+    def set_indexes(self, add):
+        with connection.schema_editor() as editor:
+            for model in INDEXED_MODELS:
+                for index in model._meta.indexes:
+                    if add:
+                        editor.add_index(model, index)
+                    else:
+                        editor.remove_index(model, index)
+        if connection.vendor in ('sqlite', 'postgresql'):
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+    def measure(self, paths, repeat):
+        results = {}
+        for label, qs in paths:
+            plan = qs.order_by().values_list('quantity').explain()
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                qs.aggregate(total=Sum('quantity'))
+                timings.append((time.perf_counter() - started) * 1000)
+            plan = ' | '.join(line.strip() for line in plan.splitlines() if line.strip())
+            results[label] = (min(timings), plan)
+        return results
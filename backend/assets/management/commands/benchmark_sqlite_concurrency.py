@@ -0,0 +1,136 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection
+
+from assets.inventory import dashboard_totals
+from assets.models import Base, EquipmentType, Purchase
+from config.sqlite import write_transaction
+
+MODES = {'default': '0', 'tuned': '1'}
+
+
+def percentile(values, pct):
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method='inclusive')[pct - 1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure SQLite throughput and latency with N parallel writers and readers, "
+        "with the stock backend and with SQLITE_TUNING (WAL, BEGIN IMMEDIATE), each "
+        "against a fresh scratch database file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8)
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--seconds', type=float, default=10.0)
+        parser.add_argument('--worker', choices=MODES, help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        if options['worker']:
+            return self.run_worker(options)
+
+        for mode, tuning in MODES.items():
+            with tempfile.TemporaryDirectory() as scratch:
+                env = {
+                    **os.environ,
+                    'DATABASE_URL': f'sqlite:///{Path(scratch) / "bench.sqlite3"}',
+                    'SQLITE_TUNING': tuning,
+                }
+                env.pop('DATABASE_REPLICA_URL', None)
+                output = subprocess.run(
+                    [sys.executable, str(settings.BASE_DIR / 'manage.py'), 'benchmark_sqlite_concurrency',
+                     '--worker', mode, '--writers', str(options['writers']),
+                     '--readers', str(options['readers']), '--seconds', str(options['seconds'])],
+                    env=env, capture_output=True, text=True, check=True,
+                ).stdout
+            self.report(mode, json.loads(output.strip().splitlines()[-1]))
+
+    def report(self, mode, result):
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"{mode} ({result['writers']} writers, {result['readers']} readers, {result['seconds']:.0f} s)"
+        ))
+        for kind in ('write', 'read'):
+            latency = result[f'{kind}_ms']
+            self.stdout.write(
+                f"  {kind}s: {len(latency) / result['seconds']:8.1f}/s  "
+                f"p50 {percentile(latency, 50):7.2f} ms  p95 {percentile(latency, 95):7.2f} ms  "
+                f"p99 {percentile(latency, 99):7.2f} ms"
+            )
+        self.stdout.write(f"  'database is locked' errors: {result['locked']}")
+
+    def run_worker(self, options):
+        call_command('migrate', verbosity=0)
+        bases = [Base.objects.create(name=f'Base {i}', code=f'B{i}') for i in range(options['writers'])]
+        rifle = EquipmentType.objects.create(name='Rifle', category='Weapon')
+        connection.close()
+
+        deadline = time.monotonic() + options['seconds']
+        start = threading.Barrier(options['writers'] + options['readers'])
+        write_ms, read_ms, locked = [], [], []
+
+        def writer(base):
+            start.wait()
+            try:
+                while time.monotonic() < deadline:
+                    began = time.perf_counter()
+                    try:
+                        with write_transaction():
+                            Purchase.objects.create(
+                                base=base, equipment_type=rifle, quantity=1,
+                                purchased_at=datetime.now(timezone.utc),
+                            )
+                    except OperationalError as exc:
+                        if 'locked' not in str(exc):
+                            raise
+                        locked.append(1)
+                        continue
+                    write_ms.append((time.perf_counter() - began) * 1000)
+            finally:
+                connection.close()
+
+        def reader(index):
+            start.wait()
+            base = bases[index % len(bases)]
+            try:
+                while time.monotonic() < deadline:
+                    began = time.perf_counter()
+                    try:
+                        list(Purchase.objects.filter(base=base).order_by('-purchased_at', '-id')[:50])
+                        dashboard_totals(base.id, rifle.id, None, datetime.now(timezone.utc).date())
+                    except OperationalError as exc:
+                        if 'locked' not in str(exc):
+                            raise
+                        locked.append(1)
+                        continue
+                    read_ms.append((time.perf_counter() - began) * 1000)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=writer, args=(base,)) for base in bases]
+        threads += [threading.Thread(target=reader, args=(i,)) for i in range(options['readers'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.stdout.write(json.dumps({
+            'writers': options['writers'], 'readers': options['readers'],
+            'seconds': options['seconds'], 'write_ms': write_ms, 'read_ms': read_ms,
+            'locked': len(locked),
+        }))
@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from assets.inventory import rebuild_ledger
+from assets.models import Base
+from assets.synthetic import create_reference_data, create_users, generate_logs, generate_movements
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill an empty database with synthetic bases, equipment types, staff, movements "
+        "and their TransactionLog rows, then rebuild the inventory ledger. Point "
+        "DATABASE_URL at a scratch database first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bases', type=int, default=40)
+        parser.add_argument('--equipment-types', type=int, default=300)
+        parser.add_argument('--rows', type=int, default=1_000_000, help='Total movement rows.')
+        parser.add_argument('--days', type=int, default=730, help='History length.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument('--no-logs', action='store_true', help='Skip the TransactionLog rows.')
+
+    def handle(self, *args, **options):
+        if Base.objects.exists():
+            raise CommandError("The database already has bases; generate into an empty one.")
+
+        started = time.perf_counter()
+        base_ids, equipment_ids = create_reference_data(options['bases'], options['equipment_types'])
+        staff = create_users(base_ids)
+        created = generate_movements(
+            base_ids, equipment_ids, options['rows'], days=options['days'], seed=options['seed'],
+            chunk_size=options['chunk_size'], staff=staff,
+        )
+        for model, count in created.items():
+            self.stdout.write(f"  {model.__name__}: {count:,}")
+        if not options['no_logs']:
+            generate_logs(chunk_size=options['chunk_size'])
+            self.stdout.write(f"  TransactionLog: {sum(created.values()):,}")
+        days = rebuild_ledger()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {sum(created.values()):,} movements for {len(base_ids)} bases and "
+            f"{len(equipment_ids)} equipment types ({days:,} ledger days) in {elapsed:.1f} s."
+        ))
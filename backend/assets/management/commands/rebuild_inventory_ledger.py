@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from assets.inventory import rebuild_ledger
+
+
+class Command(BaseCommand):
+    help = "Recompute the inventory ledger and balances from the movement tables."
+
+    def handle(self, *args, **options):
+        days = rebuild_ledger()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt inventory ledger ({days} ledger days)."))
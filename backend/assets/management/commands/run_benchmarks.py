@@ -0,0 +1,208 @@
+import json
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from accounts.serializers import ClaimsTokenObtainPairSerializer
+from assets.inventory import rebuild_ledger
+from assets.synthetic import create_reference_data, create_users, generate_logs, generate_movements
+
+# Settings that change what is measured, recorded with every run.
+RECORDED_SETTINGS = (
+    'INVENTORY_LEDGER_ENABLED', 'TRANSACTION_LOG_DEFERRED', 'DASHBOARD_CACHE_TIMEOUT',
+    'CACHE_BACKEND', 'ASYNC_PARALLEL_READS',
+)
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def summarize(timings, queries):
+    timings = sorted(timings)
+    return {
+        'p50_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'min_ms': round(timings[0], 3),
+        'max_ms': round(timings[-1], 3),
+        'queries': queries,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the dashboard, each list endpoint, log scoping and creates through the API "
+        "at several data sizes in a scratch database, and save the timings as JSON so "
+        "runs can be compared (--compare)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', default='10000,100000,1000000',
+            help='Comma-separated movement row counts; the data grows from one size to the next.',
+        )
+        parser.add_argument('--bases', type=int, default=40)
+        parser.add_argument('--equipment-types', type=int, default=300)
+        parser.add_argument('--repeat', type=int, default=20, help='Timed requests per case.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Result file (default: benchmark_results/<time>.json).')
+        parser.add_argument('--compare', help='An earlier result file to compare medians against.')
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(size) for size in options['sizes'].split(','))
+        started = datetime.now(timezone.utc)
+        report = {
+            'started_at': started.isoformat(),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'settings': {name: getattr(settings, name, None) for name in RECORDED_SETTINGS},
+            'repeat': options['repeat'],
+            'sizes': [],
+        }
+
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            # Responses must be computed, not replayed from the dashboard cache.
+            with override_settings(DASHBOARD_CACHE_TIMEOUT=0, ALLOWED_HOSTS=['*']):
+                self.run(sizes, options, report)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        output = Path(options['output'] or settings.BASE_DIR / 'benchmark_results'
+                      / f"{started.strftime('%Y%m%dT%H%M%SZ')}.json")
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(report, indent=2))
+        self.stdout.write(self.style.SUCCESS(f"Saved {output}"))
+
+        if options['compare']:
+            self.compare(json.loads(Path(options['compare']).read_text()), report)
+
+    def run(self, sizes, options, report):
+        base_ids, equipment_ids = create_reference_data(options['bases'], options['equipment_types'])
+        staff = create_users(base_ids)
+        self.users = {
+            'admin': User.objects.get(username='admin'),
+            'commander': User.objects.get(base_id=base_ids[0], role=User.ROLE_COMMANDER),
+        }
+        self.base_id, self.equipment_type_id = base_ids[0], equipment_ids[0]
+        self.other_base_id = base_ids[1]
+
+        loaded, last_log_ids = 0, None
+        for stage, size in enumerate(sizes):
+            began = time.perf_counter()
+            generate_movements(
+                base_ids, equipment_ids, size - loaded, seed=options['seed'] + stage, staff=staff,
+            )
+            last_log_ids = generate_logs(after=last_log_ids)
+            rebuild_ledger()
+            loaded = size
+            generated = time.perf_counter() - began
+
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{size:,} movement rows"))
+            results = {}
+            for label, user, method, url, body in self.cases():
+                results[label] = self.measure(user, method, url, body, options['repeat'])
+                self.stdout.write(
+                    f"  {label:32} p50 {results[label]['p50_ms']:8.2f} ms  "
+                    f"p95 {results[label]['p95_ms']:8.2f} ms  {results[label]['queries']:3} queries"
+                )
+            report['sizes'].append({
+                'rows': size, 'generate_seconds': round(generated, 2), 'results': results,
+            })
+
+    def cases(self):
+        """(label, user, method, url, body) for every measured request."""
+        today = datetime.now(timezone.utc).date()
+        pair = f'base_id={self.base_id}&equipment_type_id={self.equipment_type_id}'
+        moment = datetime.now(timezone.utc).isoformat()
+        movement = {'equipment_type': self.equipment_type_id, 'quantity': 1}
+        return [
+            ('dashboard', 'admin', 'get', f'/api/dashboard/?{pair}', None),
+            ('dashboard last 90 days', 'admin', 'get',
+             f'/api/dashboard/?{pair}&start_date={today - timedelta(days=90)}', None),
+            ('dashboard matrix', 'admin', 'get', f'/api/dashboard/matrix/?base_id={self.base_id}', None),
+            ('dashboard trend by week', 'admin', 'get', f'/api/dashboard/trend/?{pair}&interval=week', None),
+            ('list purchases', 'commander', 'get', '/api/purchases/', None),
+            ('list transfers', 'commander', 'get', '/api/transfers/', None),
+            ('list assignments', 'commander', 'get', '/api/assignments/', None),
+            ('list expenditures', 'commander', 'get', '/api/expenditures/', None),
+            ('logs, admin', 'admin', 'get', '/api/logs/', None),
+            ('logs, base-scoped commander', 'commander', 'get', '/api/logs/', None),
+            ('logs, admin by base', 'admin', 'get', f'/api/logs/?base_id={self.other_base_id}', None),
+            ('logs, admin by action type', 'admin', 'get', '/api/logs/?action_type=TRANSFER', None),
+            ('create purchase', 'commander', 'post', '/api/purchases/',
+             {**movement, 'base': self.base_id, 'purchased_at': moment}),
+            ('create transfer', 'commander', 'post', '/api/transfers/',
+             {**movement, 'from_base': self.base_id, 'to_base': self.other_base_id, 'transfer_at': moment}),
+            ('create assignment', 'commander', 'post', '/api/assignments/',
+             {**movement, 'base': self.base_id, 'assigned_to': 'Unit 1', 'assigned_at': moment}),
+            ('create expenditure', 'commander', 'post', '/api/expenditures/',
+             {**movement, 'base': self.base_id, 'expended_by': 'Unit 1', 'expended_at': moment}),
+        ]
+
+    def measure(self, user, method, url, body, repeat):
+        client = APIClient(SERVER_NAME='localhost')
+        token = ClaimsTokenObtainPairSerializer.get_token(self.users[user]).access_token
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        send = getattr(client, method)
+        expected = 201 if method == 'post' else 200
+
+        # Warm the reference and version caches, as in a running server.
+        send(url, body, format='json')
+        timings = []
+        for _ in range(repeat):
+            counter = QueryCounter()
+            with connection.execute_wrapper(counter):
+                began = time.perf_counter()
+                response = send(url, body, format='json')
+                timings.append((time.perf_counter() - began) * 1000)
+            if response.status_code != expected:
+                raise RuntimeError(f"{method.upper()} {url}: {response.status_code} {response.content[:200]}")
+        return summarize(timings, counter.count)
+
+    def compare(self, baseline, report):
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"Median change against {baseline.get('commit') or baseline['started_at']}"
+        ))
+        earlier = {stage['rows']: stage['results'] for stage in baseline['sizes']}
+        for stage in report['sizes']:
+            if stage['rows'] not in earlier:
+                continue
+            self.stdout.write(f"  {stage['rows']:,} movement rows")
+            for label, result in stage['results'].items():
+                before = earlier[stage['rows']].get(label)
+                if not before:
+                    continue
+                change = (result['p50_ms'] - before['p50_ms']) / before['p50_ms'] * 100
+                self.stdout.write(
+                    f"    {label:32} {before['p50_ms']:8.2f} -> {result['p50_ms']:8.2f} ms  {change:+6.1f}%"
+                )
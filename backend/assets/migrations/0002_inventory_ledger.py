@@ -0,0 +1,142 @@
+# Generated by Django 5.0.6 on 2026-10-18 12:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+MOVEMENTS = (
+    ("Purchase", "purchased_at", (("base_id", "purchases"),)),
+    (
+        "Transfer",
+        "transfer_at",
+        (("to_base_id", "transfers_in"), ("from_base_id", "transfers_out")),
+    ),
+    ("Assignment", "assigned_at", (("base_id", "assigned"),)),
+    ("Expenditure", "expended_at", (("base_id", "expended"),)),
+)
+
+
+def backfill_ledger(apps, schema_editor):
+    from collections import defaultdict
+    from django.db.models import Sum
+    from django.db.models.functions import TruncDate
+
+    InventoryLedger = apps.get_model("assets", "InventoryLedger")
+    InventoryBalance = apps.get_model("assets", "InventoryBalance")
+
+    days = defaultdict(lambda: defaultdict(int))
+    balances = defaultdict(lambda: defaultdict(int))
+    for model_name, date_field, targets in MOVEMENTS:
+        model = apps.get_model("assets", model_name)
+        for base_field, bucket in targets:
+            rows = (
+                model.objects.annotate(day=TruncDate(date_field))
+                .values_list(base_field, "equipment_type_id", "day")
+                .annotate(total=Sum("quantity"))
+                .order_by()
+            )
+            for base_id, equipment_type_id, day, total in rows:
+                days[(base_id, equipment_type_id, day)][bucket] += total
+                balances[(base_id, equipment_type_id)][bucket] += total
+
+    InventoryLedger.objects.bulk_create(
+        [
+            InventoryLedger(base_id=b, equipment_type_id=e, day=d, **totals)
+            for (b, e, d), totals in days.items()
+        ],
+        batch_size=1000,
+    )
+    InventoryBalance.objects.bulk_create(
+        [
+            InventoryBalance(base_id=b, equipment_type_id=e, **totals)
+            for (b, e), totals in balances.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("assets", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="InventoryBalance",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("purchases", models.BigIntegerField(default=0)),
+                ("transfers_in", models.BigIntegerField(default=0)),
+                ("transfers_out", models.BigIntegerField(default=0)),
+                ("assigned", models.BigIntegerField(default=0)),
+                ("expended", models.BigIntegerField(default=0)),
+                (
+                    "base",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="balances",
+                        to="assets.base",
+                    ),
+                ),
+                (
+                    "equipment_type",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="balances",
+                        to="assets.equipmenttype",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("base", "equipment_type")},
+            },
+        ),
+        migrations.CreateModel(
+            name="InventoryLedger",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("purchases", models.BigIntegerField(default=0)),
+                ("transfers_in", models.BigIntegerField(default=0)),
+                ("transfers_out", models.BigIntegerField(default=0)),
+                ("assigned", models.BigIntegerField(default=0)),
+                ("expended", models.BigIntegerField(default=0)),
+                ("day", models.DateField()),
+                (
+                    "base",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ledger_days",
+                        to="assets.base",
+                    ),
+                ),
+                (
+                    "equipment_type",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ledger_days",
+                        to="assets.equipmenttype",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("base", "equipment_type", "day")},
+            },
+        ),
+        migrations.RunPython(backfill_ledger, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.0.6 on 2026-10-18 12:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("assets", "0002_inventory_ledger"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="assignment",
+            index=models.Index(
+                fields=["base", "equipment_type", "assigned_at"],
+                name="assignment_base_eq_time_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="assignment",
+            index=models.Index(fields=["assigned_at"], name="assignment_time_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="expenditure",
+            index=models.Index(
+                fields=["base", "equipment_type", "expended_at"],
+                name="expenditure_base_eq_time_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="expenditure",
+            index=models.Index(fields=["expended_at"], name="expenditure_time_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="purchase",
+            index=models.Index(
+                fields=["base", "equipment_type", "purchased_at"],
+                name="purchase_base_eq_time_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="purchase",
+            index=models.Index(fields=["purchased_at"], name="purchase_time_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="transfer",
+            index=models.Index(
+                fields=["from_base", "equipment_type", "transfer_at"],
+                name="transfer_from_eq_time_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transfer",
+            index=models.Index(
+                fields=["to_base", "equipment_type", "transfer_at"],
+                name="transfer_to_eq_time_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transfer",
+            index=models.Index(fields=["transfer_at"], name="transfer_time_idx"),
+        ),
+    ]
@@ -33,6 +33,12 @@ class Purchase(models.Model):
     notes = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['base', 'equipment_type', 'purchased_at'], name='purchase_base_eq_time_idx'),
+            models.Index(fields=['purchased_at'], name='purchase_time_idx'),
+        ]
+
     @property
     def total_cost(self):
         if self.unit_cost is not None:
@@ -52,6 +58,13 @@ class Transfer(models.Model):
     notes = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['from_base', 'equipment_type', 'transfer_at'], name='transfer_from_eq_time_idx'),
+            models.Index(fields=['to_base', 'equipment_type', 'transfer_at'], name='transfer_to_eq_time_idx'),
+            models.Index(fields=['transfer_at'], name='transfer_time_idx'),
+        ]
+
     def __str__(self):
         return f"Transfer {self.id} - {self.equipment_type} {self.from_base}->{self.to_base}"
 
@@ -65,6 +78,12 @@ class Assignment(models.Model):
     purpose = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['base', 'equipment_type', 'assigned_at'], name='assignment_base_eq_time_idx'),
+            models.Index(fields=['assigned_at'], name='assignment_time_idx'),
+        ]
+
     def __str__(self):
         return f"Assignment {self.id} - {self.equipment_type} -> {self.assigned_to}"
 
@@ -78,5 +97,51 @@ class Expenditure(models.Model):
     reason = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['base', 'equipment_type', 'expended_at'], name='expenditure_base_eq_time_idx'),
+            models.Index(fields=['expended_at'], name='expenditure_time_idx'),
+        ]
+
     def __str__(self):
         return f"Expenditure {self.id} - {self.equipment_type} - {self.base}"
+
+class MovementBuckets(models.Model):
+    purchases = models.BigIntegerField(default=0)
+    transfers_in = models.BigIntegerField(default=0)
+    transfers_out = models.BigIntegerField(default=0)
+    assigned = models.BigIntegerField(default=0)
+    expended = models.BigIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def on_hand(self):
+        return (
+            self.purchases + self.transfers_in - self.transfers_out
+            - self.assigned - self.expended
+        )
+
+class InventoryLedger(MovementBuckets):
+    # Per-day movement totals, kept current by assets.signals.
+    base = models.ForeignKey(Base, on_delete=models.CASCADE, related_name='ledger_days')
+    equipment_type = models.ForeignKey(EquipmentType, on_delete=models.CASCADE, related_name='ledger_days')
+    day = models.DateField()
+
+    class Meta:
+        unique_together = ('base', 'equipment_type', 'day')
+
+    def __str__(self):
+        return f"Ledger {self.base_id}/{self.equipment_type_id} {self.day}"
+
+class InventoryBalance(MovementBuckets):
+    # All-time movement totals for a (base, equipment_type) pair.
+    base = models.ForeignKey(Base, on_delete=models.CASCADE, related_name='balances')
+    equipment_type = models.ForeignKey(EquipmentType, on_delete=models.CASCADE, related_name='balances')
+
+    class Meta:
+        unique_together = ('base', 'equipment_type')
+
+    def __str__(self):
+        return f"Balance {self.base_id}/{self.equipment_type_id}: {self.on_hand}"
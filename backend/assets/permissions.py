@@ -10,18 +10,18 @@ class BaseScopedPermission(BasePermission):
         if user.is_superuser or user.role == User.ROLE_ADMIN:
             return True
 
-        user_base = user.base
+        user_base = user.base_id
         if user_base is None:
             return False
 
         # For models with 'base'
-        base_field = getattr(obj, 'base', None)
+        base_field = getattr(obj, 'base_id', None)
         if base_field is not None:
             return base_field == user_base
 
         # For Transfer: check involvement
-        from_base = getattr(obj, 'from_base', None)
-        to_base = getattr(obj, 'to_base', None)
+        from_base = getattr(obj, 'from_base_id', None)
+        to_base = getattr(obj, 'to_base_id', None)
         if from_base or to_base:
             return user_base in (from_base, to_base)
 
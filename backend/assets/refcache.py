@@ -0,0 +1,124 @@
+"""
+Process-local copies of the small reference tables (Base, EquipmentType).
+
+Each process keeps an id -> object map per model and reloads it whole when
+the model's version in the Django cache changes. Saves and deletes bump that
+version (see ``signals``), so every worker drops its copy on its next read.
+In steady state a lookup costs one cache get and no database query.
+
+The cached instances are shared between requests: treat them as read-only.
+"""
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.http import Http404
+from django.utils.functional import cached_property
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.response import Response
+
+from config import metrics
+
+from .models import Base, EquipmentType
+
+
+class ReferenceCache:
+
+    def __init__(self, model):
+        self.model = model
+        self.key = f'assets:refcache:{model._meta.label_lower}'
+        self.name = f'refcache:{model._meta.model_name}'
+        self.version = None
+        self.objects = {}
+        self.lock = threading.Lock()
+
+    def current(self):
+        version = cache.get(self.key)
+        if version is None:
+            cache.add(self.key, time.time_ns(), timeout=None)
+            version = cache.get(self.key)
+        metrics.count_cache(self.name, version == self.version)
+        if version != self.version:
+            with self.lock:
+                if version != self.version:
+                    # From the primary: a lagging replica would pin stale rows
+                    # to the new version.
+                    rows = self.model.objects.using(DEFAULT_DB_ALIAS).order_by('pk')
+                    self.objects = {obj.pk: obj for obj in rows}
+                    self.version = version
+        return self.objects
+
+    async def acurrent(self):
+        """``current`` for async code; only a reload needs a thread."""
+        version = cache.get(self.key)
+        if version is None or version != self.version:
+            return await sync_to_async(self.current)()
+        metrics.count_cache(self.name, True)
+        return self.objects
+
+    def invalidate(self):
+        cache.set(self.key, time.time_ns(), timeout=None)
+
+    def all(self):
+        return list(self.current().values())
+
+    def get(self, pk, objects=None):
+        """The object with primary key ``pk``, or None. ``objects`` pins a ``current()`` map."""
+        objects = self.current() if objects is None else objects
+        try:
+            return objects.get(int(pk))
+        except (TypeError, ValueError):
+            return None
+
+    def first(self, objects=None):
+        objects = self.current() if objects is None else objects
+        return objects[min(objects)] if objects else None
+
+
+bases = ReferenceCache(Base)
+equipment_types = ReferenceCache(EquipmentType)
+
+REFERENCE_CACHES = {ref.model: ref for ref in (bases, equipment_types)}
+
+
+class ReferenceCacheMixin:
+    """Serve list and retrieve of a reference-data viewset from its cache."""
+
+    reference_cache = None
+
+    def list(self, request, *args, **kwargs):
+        return Response(self.get_serializer(self.reference_cache.all(), many=True).data)
+
+    def get_object(self):
+        if self.request.method not in SAFE_METHODS:
+            return super().get_object()
+        obj = self.reference_cache.get(self.kwargs[self.lookup_url_kwarg or self.lookup_field])
+        if obj is None:
+            raise Http404
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+
+class CachedPrimaryKeyRelatedField(PrimaryKeyRelatedField):
+    """Validates foreign keys to reference tables against the cache, not the database."""
+
+    @cached_property
+    def reference_cache(self):
+        queryset = self.get_queryset()
+        return REFERENCE_CACHES.get(queryset.model) if queryset is not None else None
+
+    def to_internal_value(self, data):
+        if self.reference_cache is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            obj = self.reference_cache.current().get(int(data))
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if obj is None:
+            self.fail('does_not_exist', pk_value=data)
+        return obj
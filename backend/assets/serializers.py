@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import Base, EquipmentType, Purchase, Transfer, Assignment, Expenditure
+from .refcache import CachedPrimaryKeyRelatedField
 
 class BaseSerializer(serializers.ModelSerializer):
     class Meta:
@@ -12,7 +13,8 @@ class EquipmentTypeSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'category', 'description', 'unit']
 
 class PurchaseSerializer(serializers.ModelSerializer):
-    created_by = serializers.ReadOnlyField(source='created_by.id')
+    serializer_related_field = CachedPrimaryKeyRelatedField
+    created_by = serializers.ReadOnlyField(source='created_by_id')
 
     class Meta:
         model = Purchase
@@ -23,7 +25,8 @@ class PurchaseSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_by', 'created_at', 'total_cost']
 
 class TransferSerializer(serializers.ModelSerializer):
-    created_by = serializers.ReadOnlyField(source='created_by.id')
+    serializer_related_field = CachedPrimaryKeyRelatedField
+    created_by = serializers.ReadOnlyField(source='created_by_id')
 
     class Meta:
         model = Transfer
@@ -34,7 +37,8 @@ class TransferSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_by', 'created_at']
 
 class AssignmentSerializer(serializers.ModelSerializer):
-    created_by = serializers.ReadOnlyField(source='created_by.id')
+    serializer_related_field = CachedPrimaryKeyRelatedField
+    created_by = serializers.ReadOnlyField(source='created_by_id')
 
     class Meta:
         model = Assignment
@@ -45,7 +49,8 @@ class AssignmentSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_by', 'created_at']
 
 class ExpenditureSerializer(serializers.ModelSerializer):
-    created_by = serializers.ReadOnlyField(source='created_by.id')
+    serializer_related_field = CachedPrimaryKeyRelatedField
+    created_by = serializers.ReadOnlyField(source='created_by_id')
 
     class Meta:
         model = Expenditure
@@ -0,0 +1,53 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from . import versions
+from .inventory import MOVEMENT_SOURCES, apply_entries, movement_entries
+from .models import Base
+from .refcache import REFERENCE_CACHES
+
+MOVEMENT_MODELS = tuple(MOVEMENT_SOURCES)
+
+
+@receiver(pre_save)
+def remember_previous_movement(sender, instance, raw, **kwargs):
+    if sender not in MOVEMENT_MODELS or raw or instance.pk is None:
+        return
+    previous = sender.objects.filter(pk=instance.pk).first()
+    instance._ledger_previous = movement_entries(previous) if previous else []
+
+
+@receiver(post_save)
+def update_ledger_on_save(sender, instance, created, raw, **kwargs):
+    if sender not in MOVEMENT_MODELS or raw:
+        return
+    previous = getattr(instance, '_ledger_previous', [])
+    instance._ledger_previous = []
+    reversed_previous = [entry[:-1] + (-entry[-1],) for entry in previous]
+    entries = reversed_previous + movement_entries(instance)
+    apply_entries(entries)
+    versions.bump_on_commit(*{base_id for base_id, *_ in entries})
+
+
+@receiver(post_delete)
+def update_ledger_on_delete(sender, instance, **kwargs):
+    if sender not in MOVEMENT_MODELS:
+        return
+    entries = movement_entries(instance)
+    apply_entries(entries, sign=-1)
+    versions.bump_on_commit(*{base_id for base_id, *_ in entries})
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_reference_cache(sender, **kwargs):
+    ref = REFERENCE_CACHES.get(sender)
+    if ref is None:
+        return
+    # Now, for this process's next read, and again on commit, so no worker
+    # keeps a copy it reloaded before the change was visible.
+    ref.invalidate()
+    transaction.on_commit(ref.invalidate)
+    if sender is Base:
+        versions.bump_on_commit(kwargs['instance'].pk)
@@ -0,0 +1,281 @@
+"""
+Synthetic data for benchmarks and load tests.
+
+Rows go in with ``bulk_create`` in chunks, so no signals run: rebuild the
+inventory ledger afterwards (``rebuild_ledger``) if it is needed. The shape
+loosely follows a real deployment: a few bases and equipment types carry
+most of the traffic, activity grows towards the present, and movements
+happen mostly on weekdays during duty hours. Like the API's stock check,
+transfers, assignments and expenditures never take more than is on hand,
+counted in insertion order.
+"""
+import random
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+
+from accounts.models import User
+from logs.models import TransactionLog
+from logs.writer import build_entry
+from .inventory import balance_of, movement_matrix
+from .models import Base, EquipmentType, Purchase, Transfer, Assignment, Expenditure
+
+# Share of generated movement rows per model.
+MOVEMENT_MIX = (
+    (Purchase, 0.30),
+    (Transfer, 0.20),
+    (Assignment, 0.30),
+    (Expenditure, 0.20),
+)
+
+# Zipf exponent for how unevenly traffic spreads over bases and equipment.
+SKEW = 0.8
+
+# Share of weekend activity kept, relative to a weekday.
+WEEKEND_ACTIVITY = 0.35
+
+# Skewed picks tried for a withdrawal before falling back to any stocked pair.
+STOCK_ATTEMPTS = 10
+
+DATE_FIELDS = {
+    Purchase: 'purchased_at',
+    Transfer: 'transfer_at',
+    Assignment: 'assigned_at',
+    Expenditure: 'expended_at',
+}
+
+
+def create_reference_data(bases, equipment_types):
+    Base.objects.bulk_create(
+        [Base(name=f'Base {i}', code=f'B{i:04d}', location=f'Sector {i % 12}') for i in range(bases)]
+    )
+    EquipmentType.objects.bulk_create(
+        [
+            EquipmentType(name=f'Equipment {i}', category=f'Category {i % 8}')
+            for i in range(equipment_types)
+        ]
+    )
+    return (
+        list(Base.objects.values_list('id', flat=True)),
+        list(EquipmentType.objects.values_list('id', flat=True)),
+    )
+
+
+def create_users(base_ids, password='password'):
+    """
+    One admin plus a commander and a logistics officer per base.
+
+    Returns {base_id: [user ids]} of the base staff, who are recorded as the
+    creators of that base's movements.
+    """
+    hashed = make_password(password)
+    User.objects.bulk_create(
+        [User(username='admin', role=User.ROLE_ADMIN, password=hashed, is_staff=True)]
+        + [
+            User(username=f'{role.lower()}{base_id}', role=role, base_id=base_id, password=hashed)
+            for base_id in base_ids
+            for role in (User.ROLE_COMMANDER, User.ROLE_LOGISTICS)
+        ],
+        ignore_conflicts=True,
+    )
+    staff = {base_id: [] for base_id in base_ids}
+    for user_id, base_id in User.objects.filter(base_id__in=base_ids).values_list('id', 'base_id'):
+        staff[base_id].append(user_id)
+    return staff
+
+
+@contextmanager
+def own_timestamps(*models):
+    """Let bulk-created rows keep the ``auto_now_add`` values they are given."""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class _Sampler:
+    """Skewed choices of bases and equipment, and moments weighted towards the present."""
+
+    def __init__(self, rnd, base_ids, equipment_ids, days, end):
+        self.rnd = rnd
+        self.base_ids = base_ids
+        self.equipment_ids = equipment_ids
+        self.base_weights = list(accumulate(1 / (rank + 1) ** SKEW for rank in range(len(base_ids))))
+        self.equipment_weights = list(
+            accumulate(1 / (rank + 1) ** SKEW for rank in range(len(equipment_ids)))
+        )
+        self.days = days
+        self.end = end
+
+    def base(self):
+        return self.rnd.choices(self.base_ids, cum_weights=self.base_weights)[0]
+
+    def other_base(self, first):
+        second = self.base()
+        while second == first and len(self.base_ids) > 1:
+            second = self.rnd.choice(self.base_ids)
+        return second
+
+    def equipment(self):
+        return self.rnd.choices(self.equipment_ids, cum_weights=self.equipment_weights)[0]
+
+    def moment(self):
+        while True:
+            # Density rises linearly towards `end`.
+            day = self.end - timedelta(days=int(self.rnd.triangular(0, self.days, 0)))
+            if day.weekday() < 5 or self.rnd.random() < WEEKEND_ACTIVITY:
+                break
+        hour = min(23, max(0, int(self.rnd.gauss(12, 3))))
+        moment = day.replace(hour=hour, minute=self.rnd.randrange(60), second=self.rnd.randrange(60))
+        return min(moment, self.end)
+
+
+class _Stock:
+    """On-hand quantity per (base, equipment) pair, with the stocked pairs kept for O(1) picks."""
+
+    def __init__(self, on_hand=()):
+        self.on_hand = {}
+        self.stocked = []
+        self.slots = {}
+        for pair, quantity in dict(on_hand).items():
+            self.add(pair, quantity)
+
+    @classmethod
+    def in_database(cls):
+        return cls(
+            (pair, balance_of(totals['in_range']))
+            for pair, totals in movement_matrix(None, None, None, None).items()
+        )
+
+    def __getitem__(self, pair):
+        return self.on_hand.get(pair, 0)
+
+    def add(self, pair, quantity):
+        if quantity <= 0:
+            return
+        if not self[pair]:
+            self.slots[pair] = len(self.stocked)
+            self.stocked.append(pair)
+        self.on_hand[pair] = self[pair] + quantity
+
+    def take(self, pair, quantity):
+        self.on_hand[pair] -= quantity
+        if not self.on_hand[pair]:
+            # Swap the last stocked pair into the emptied slot.
+            last = self.stocked.pop()
+            slot = self.slots.pop(pair)
+            if last != pair:
+                self.stocked[slot] = last
+                self.slots[last] = slot
+
+    def pick(self, rnd, sample):
+        """A stocked pair, skewed like any other pick when possible; None when nothing is stocked."""
+        for _ in range(STOCK_ATTEMPTS):
+            pair = (sample.base(), sample.equipment())
+            if self[pair]:
+                return pair
+        return rnd.choice(self.stocked) if self.stocked else None
+
+
+def _movement(model, rnd, sample, staff, stock):
+    quantity = max(1, int(rnd.lognormvariate(2.3, 0.9)))
+    moment = sample.moment()
+    pair = None if model is Purchase else stock.pick(rnd, sample)
+    if pair is None:
+        # Bought in bulk, so more than is moved or used at a time. Also what
+        # a withdrawal becomes while nothing is on hand anywhere.
+        model, pair, quantity = Purchase, (sample.base(), sample.equipment()), quantity * 4
+        stock.add(pair, quantity)
+    else:
+        quantity = min(quantity, stock[pair])
+        stock.take(pair, quantity)
+
+    base_id, equipment_type_id = pair
+    if model is Transfer:
+        to_base_id = sample.other_base(base_id)
+        stock.add((to_base_id, equipment_type_id), quantity)
+        return Transfer(
+            from_base_id=base_id, to_base_id=to_base_id,
+            equipment_type_id=equipment_type_id, quantity=quantity, transfer_at=moment,
+            created_by_id=rnd.choice(staff[base_id]) if staff else None, created_at=moment,
+        )
+
+    common = {
+        'base_id': base_id, 'equipment_type_id': equipment_type_id, 'created_at': moment,
+        'created_by_id': rnd.choice(staff[base_id]) if staff else None,
+    }
+    if model is Purchase:
+        return Purchase(quantity=quantity, purchased_at=moment, **common)
+    if model is Assignment:
+        return Assignment(
+            assigned_to=f'Unit {rnd.randint(1, 500)}', quantity=quantity, assigned_at=moment, **common
+        )
+    return Expenditure(
+        expended_by=f'Unit {rnd.randint(1, 500)}', quantity=quantity, expended_at=moment, **common
+    )
+
+
+def generate_movements(base_ids, equipment_ids, rows, days=730, seed=0, chunk_size=5000, end=None,
+                       staff=None):
+    """
+    Insert ``rows`` movement rows spread over the last ``days`` days, on top
+    of the stock the movement tables already hold.
+
+    ``staff`` ({base_id: [user ids]}, see ``create_users``) sets who created
+    each movement. Returns {model: rows created}.
+    """
+    rnd = random.Random(seed)
+    end = end or datetime.now(timezone.utc).replace(microsecond=0)
+    sample = _Sampler(rnd, base_ids, equipment_ids, days, end)
+    stock = _Stock.in_database()
+    created = dict.fromkeys(DATE_FIELDS, 0)
+
+    # Truncated shares leave a remainder; the last model takes it.
+    counts = [int(rows * share) for _, share in MOVEMENT_MIX[:-1]]
+    counts.append(rows - sum(counts))
+    with own_timestamps(*DATE_FIELDS):
+        for (model, _), remaining in zip(MOVEMENT_MIX, counts):
+            while remaining:
+                size = min(chunk_size, remaining)
+                batch = [_movement(model, rnd, sample, staff, stock) for _ in range(size)]
+                # A withdrawal with nothing on hand anywhere came back as a purchase.
+                for kind in DATE_FIELDS:
+                    chunk = [movement for movement in batch if type(movement) is kind]
+                    kind.objects.bulk_create(chunk)
+                    created[kind] += len(chunk)
+                remaining -= size
+    return created
+
+
+def generate_logs(after=None, chunk_size=5000):
+    """
+    Insert the TransactionLog row of every movement with an id above
+    ``after[model]`` (all of them by default), stamped with the movement's
+    own time. Returns {model: highest movement id seen}, for the next call.
+    """
+    after = after or {}
+    last_ids = {}
+    with own_timestamps(TransactionLog):
+        for model, date_field in DATE_FIELDS.items():
+            last_ids[model] = after.get(model, 0)
+            movements = model.objects.filter(pk__gt=last_ids[model]).order_by('pk')
+            batch = []
+            for movement in movements.iterator(chunk_size=chunk_size):
+                entry = build_entry(movement)
+                entry.timestamp = getattr(movement, date_field)
+                batch.append(entry)
+                last_ids[model] = movement.pk
+                if len(batch) == chunk_size:
+                    TransactionLog.objects.bulk_create(batch)
+                    batch = []
+            TransactionLog.objects.bulk_create(batch)
+    return last_ids
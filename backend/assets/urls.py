@@ -5,7 +5,8 @@ from .views import (
     BaseViewSet, EquipmentTypeViewSet,
     PurchaseViewSet, TransferViewSet,
     AssignmentViewSet, ExpenditureViewSet,
-    DashboardView,
+    DashboardView, DashboardMatrixView, DashboardTrendView, DashboardCacheStatsView,
+    AsyncDashboardView,
 )
 
 router = DefaultRouter()
@@ -19,4 +20,8 @@ router.register(r'expenditures', ExpenditureViewSet, basename='expenditure')
 urlpatterns = [
     path('', include(router.urls)),
     path('dashboard/', DashboardView.as_view(), name='dashboard'),
+    path('dashboard/matrix/', DashboardMatrixView.as_view(), name='dashboard-matrix'),
+    path('dashboard/trend/', DashboardTrendView.as_view(), name='dashboard-trend'),
+    path('dashboard/cache/', DashboardCacheStatsView.as_view(), name='dashboard-cache'),
+    path('async/dashboard/', AsyncDashboardView.as_view(), name='dashboard-async'),
 ]
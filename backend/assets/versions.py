@@ -0,0 +1,42 @@
+"""
+Per-base change versions, kept in the Django cache.
+
+A version is the ``time.time_ns()`` of the last committed write that could
+change what a base's movements, logs or dashboard look like. Every bump
+also moves the ``*`` version, which covers unscoped (admin) reads. Readers
+compare versions instead of looking at the rows, e.g. to answer a
+conditional GET without running the query.
+"""
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+ALL = '*'
+
+
+def _key(scope):
+    return f'assets:changes:{scope}'
+
+
+def bump(*base_ids):
+    now = time.time_ns()
+    scopes = {base_id for base_id in base_ids if base_id is not None} | {ALL}
+    cache.set_many({_key(scope): now for scope in scopes}, timeout=None)
+
+
+def bump_on_commit(*base_ids):
+    """Bump once the current transaction commits (immediately in autocommit)."""
+    transaction.on_commit(lambda: bump(*base_ids))
+
+
+def current(base_ids=None):
+    """The versions of ``base_ids`` (or of everything), in the given order."""
+    keys = [_key(base_id) for base_id in (base_ids or [ALL])]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            # Unknown history (first use or eviction): treat it as changed now.
+            cache.add(key, time.time_ns(), timeout=None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
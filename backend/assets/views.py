@@ -1,17 +1,14 @@
-from datetime import datetime
-from django.db.models import Sum
-from django.utils.dateparse import parse_date
+from django.utils import timezone
 from rest_framework import viewsets
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
 from accounts.models import User
-from accounts.permissions import (
-    IsAdmin,
-    IsAdminOrCommander,
-    IsAdminCommanderOrLogistics,
-    IsAdminOrReadOnly
-)
+from accounts.permissions import RoleRoutePermission
+from config.async_views import AsyncAPIView, json_response
+from config.conditional import ConditionalGetMixin
+from config.database import ReplicaReadMixin
+from config.sqlite import write_transaction
 from .models import Base, EquipmentType, Purchase, Transfer, Assignment, Expenditure
 from .serializers import (
     BaseSerializer, EquipmentTypeSerializer,
@@ -19,338 +16,290 @@ from .serializers import (
     AssignmentSerializer, ExpenditureSerializer
 )
 from .permissions import BaseScopedPermission
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from . import dashboard_cache, refcache
+from .bulk import BulkCreateMixin
+from .exports import ExportMixin
+from .filters import MovementFilter, parse_date_range, parse_id
+from .inventory import (
+    TREND_INTERVALS, stock_checked,
+    adashboard_totals, dashboard_totals, dashboard_matrix, dashboard_trend,
+    balance_of, running_balances,
+)
+
+class StockCheckedChangesMixin:
+    """
+    Edits and deletes of movements, like creates of outgoing ones, may not
+    take a balance below zero: the ledger signals apply the old row's
+    reversal and the new row together under ``stock_checked()``.
+    """
+
+    def perform_update(self, serializer):
+        with write_transaction(), stock_checked():
+            serializer.save()
 
-class BaseViewSet(viewsets.ModelViewSet):
+    def perform_destroy(self, instance):
+        with write_transaction(), stock_checked():
+            instance.delete()
+
+
+class BaseViewSet(refcache.ReferenceCacheMixin, viewsets.ModelViewSet):
     queryset = Base.objects.all()
+    reference_cache = refcache.bases
     serializer_class = BaseSerializer
-    authentication_classes = [JWTAuthentication] 
-    permission_classes = [IsAdminOrReadOnly]
+    write_roles = [User.ROLE_ADMIN]
+    pagination_class = None
 
-    def list(self, request, *args, **kwargs):
-        print("DEBUG /api/bases/ user:", request.user)
-        print("DEBUG /api/bases/ headers:", request.headers)
-        return super().list(request, *args, **kwargs)
 
-
-class EquipmentTypeViewSet(viewsets.ModelViewSet):
+class EquipmentTypeViewSet(refcache.ReferenceCacheMixin, viewsets.ModelViewSet):
     queryset = EquipmentType.objects.all()
+    reference_cache = refcache.equipment_types
     serializer_class = EquipmentTypeSerializer
-    authentication_classes = [JWTAuthentication] 
-    permission_classes = [IsAdminOrReadOnly]
+    write_roles = [User.ROLE_ADMIN]
+    pagination_class = None
 
 
-class PurchaseViewSet(viewsets.ModelViewSet):
+class PurchaseViewSet(ReplicaReadMixin, ConditionalGetMixin, StockCheckedChangesMixin, BulkCreateMixin, ExportMixin, viewsets.ModelViewSet):
     serializer_class = PurchaseSerializer
-    permission_classes = [IsAuthenticated, IsAdminCommanderOrLogistics, BaseScopedPermission]
+    permission_classes = [RoleRoutePermission, BaseScopedPermission]
+    movement_filter = MovementFilter('purchased_at')
+    keyset_field = 'purchased_at'
+    export_fields = ('id', 'base_id', 'equipment_type_id', 'quantity', 'unit_cost',
+                     'purchased_at', 'created_by_id', 'notes', 'created_at')
 
     def get_queryset(self):
-        user = self.request.user
         qs = Purchase.objects.select_related('base', 'equipment_type')
+        return self.movement_filter.filter_queryset(qs, self.request.user, self.request.query_params)
 
-        if user.is_superuser or user.role == User.ROLE_ADMIN:
-            pass
-        elif user.base:
-            qs = qs.filter(base=user.base)
-        else:
-            return Purchase.objects.none()
-
-        params = self.request.query_params
-        base_id = params.get('base_id')
-        eq_id = params.get('equipment_type_id')
-        start = params.get('start_date')
-        end = params.get('end_date')
-
-        if base_id:
-            qs = qs.filter(base_id=base_id)
-        if eq_id:
-            qs = qs.filter(equipment_type_id=eq_id)
-        if start:
-            qs = qs.filter(purchased_at__date__gte=start)
-        if end:
-            qs = qs.filter(purchased_at__date__lte=end)
-
-        return qs
-
-    def perform_create(self, serializer):
+    def check_create_allowed(self, data):
         user = self.request.user
-        base = serializer.validated_data['base']
         if not (user.is_superuser or user.role == User.ROLE_ADMIN):
-            if user.base is None or user.base != base:
-                raise PermissionError("You can only create purchases for your own base.")
-        serializer.save(created_by=user)
+            if user.base_id is None or user.base_id != data['base'].id:
+                raise PermissionDenied("You can only create purchases for your own base.")
+
+    def perform_create(self, serializer):
+        self.check_create_allowed(serializer.validated_data)
+        with write_transaction():
+            serializer.save(created_by_id=self.request.user.id)
 
 
 
-class TransferViewSet(viewsets.ModelViewSet):
+class TransferViewSet(ReplicaReadMixin, ConditionalGetMixin, StockCheckedChangesMixin, BulkCreateMixin, ExportMixin, viewsets.ModelViewSet):
     serializer_class = TransferSerializer
-    permission_classes = [IsAuthenticated, IsAdminCommanderOrLogistics, BaseScopedPermission]
+    permission_classes = [RoleRoutePermission, BaseScopedPermission]
+    movement_filter = MovementFilter('transfer_at', base_fields=('from_base', 'to_base'))
+    keyset_field = 'transfer_at'
+    export_fields = ('id', 'from_base_id', 'to_base_id', 'equipment_type_id', 'quantity',
+                     'transfer_at', 'created_by_id', 'notes', 'created_at')
 
     def get_queryset(self):
-        user = self.request.user
         qs = Transfer.objects.select_related('from_base', 'to_base', 'equipment_type')
+        return self.movement_filter.filter_queryset(qs, self.request.user, self.request.query_params)
 
-        if user.is_superuser or user.role == User.ROLE_ADMIN:
-            pass
-        elif user.base:
-            qs = qs.filter(from_base=user.base) | qs.filter(to_base=user.base)
-        else:
-            return Transfer.objects.none()
-
-
-        params = self.request.query_params
-        base_id = params.get('base_id')          
-        eq_id = params.get('equipment_type_id')
-        start = params.get('start_date')
-        end = params.get('end_date')
-
-        if base_id:
-            qs = qs.filter(from_base_id=base_id) | qs.filter(to_base_id=base_id)
-        if eq_id:
-            qs = qs.filter(equipment_type_id=eq_id)
-        if start:
-            qs = qs.filter(transfer_at__date__gte=start)
-        if end:
-            qs = qs.filter(transfer_at__date__lte=end)
-
-        return qs
-
-    def perform_create(self, serializer):
+    def check_create_allowed(self, data):
         user = self.request.user
-        from_base = serializer.validated_data['from_base']
-        to_base = serializer.validated_data['to_base']
+        from_base = data['from_base']
+        to_base = data['to_base']
 
         if not (user.is_superuser or user.role == User.ROLE_ADMIN):
-            if user.base is None or user.base != from_base:
-                raise PermissionError("You can only transfer assets out from your own base.")
+            if user.base_id is None or user.base_id != from_base.id:
+                raise PermissionDenied("You can only transfer assets out from your own base.")
         if from_base == to_base:
-            raise ValueError("From and To base cannot be the same.")
+            raise ValidationError("From and To base cannot be the same.")
 
-        serializer.save(created_by=user)
+    def perform_create(self, serializer):
+        self.check_create_allowed(serializer.validated_data)
+        with write_transaction(), stock_checked():
+            serializer.save(created_by_id=self.request.user.id)
 
 
 
-class AssignmentViewSet(viewsets.ModelViewSet):
+class AssignmentViewSet(ReplicaReadMixin, ConditionalGetMixin, StockCheckedChangesMixin, BulkCreateMixin, ExportMixin, viewsets.ModelViewSet):
     serializer_class = AssignmentSerializer
-    permission_classes = [IsAuthenticated, IsAdminOrCommander, BaseScopedPermission]
+    permission_classes = [RoleRoutePermission, BaseScopedPermission]
+    allowed_roles = [User.ROLE_ADMIN, User.ROLE_COMMANDER]
+    movement_filter = MovementFilter('assigned_at')
+    keyset_field = 'assigned_at'
+    export_fields = ('id', 'base_id', 'equipment_type_id', 'assigned_to', 'quantity',
+                     'assigned_at', 'purpose', 'created_by_id', 'created_at')
 
     def get_queryset(self):
-        user = self.request.user
         qs = Assignment.objects.select_related('base', 'equipment_type')
+        return self.movement_filter.filter_queryset(qs, self.request.user, self.request.query_params)
 
-        if user.is_superuser or user.role == User.ROLE_ADMIN:
-            pass
-        elif user.base:
-            qs = qs.filter(base=user.base)
-        else:
-            return Assignment.objects.none()
+    def check_create_allowed(self, data):
+        user = self.request.user
+        if not (user.is_superuser or user.role == User.ROLE_ADMIN):
+            if user.base_id is None or user.base_id != data['base'].id:
+                raise PermissionDenied("You can only assign assets from your own base.")
 
-        params = self.request.query_params
-        base_id = params.get('base_id')
-        eq_id = params.get('equipment_type_id')
-        start = params.get('start_date')
-        end = params.get('end_date')
+    def perform_create(self, serializer):
+        self.check_create_allowed(serializer.validated_data)
+        with write_transaction(), stock_checked():
+            serializer.save(created_by_id=self.request.user.id)
 
-        if base_id:
-            qs = qs.filter(base_id=base_id)
-        if eq_id:
-            qs = qs.filter(equipment_type_id=eq_id)
-        if start:
-            qs = qs.filter(assigned_at__date__gte=start)
-        if end:
-            qs = qs.filter(assigned_at__date__lte=end)
 
-        return qs
 
-    def perform_create(self, serializer):
+class ExpenditureViewSet(ReplicaReadMixin, ConditionalGetMixin, StockCheckedChangesMixin, BulkCreateMixin, ExportMixin, viewsets.ModelViewSet):
+    serializer_class = ExpenditureSerializer
+    permission_classes = [RoleRoutePermission, BaseScopedPermission]
+    allowed_roles = [User.ROLE_ADMIN, User.ROLE_COMMANDER]
+    movement_filter = MovementFilter('expended_at')
+    keyset_field = 'expended_at'
+    export_fields = ('id', 'base_id', 'equipment_type_id', 'expended_by', 'quantity',
+                     'expended_at', 'reason', 'created_by_id', 'created_at')
+
+    def get_queryset(self):
+        qs = Expenditure.objects.select_related('base', 'equipment_type')
+        return self.movement_filter.filter_queryset(qs, self.request.user, self.request.query_params)
+
+    def check_create_allowed(self, data):
         user = self.request.user
-        base = serializer.validated_data['base']
         if not (user.is_superuser or user.role == User.ROLE_ADMIN):
-            if user.base is None or user.base != base:
-                raise PermissionError("You can only assign assets from your own base.")
-        serializer.save(created_by=user)
+            if user.base_id is None or user.base_id != data['base'].id:
+                raise PermissionDenied("You can only record expenditures for your own base.")
 
+    def perform_create(self, serializer):
+        self.check_create_allowed(serializer.validated_data)
+        with write_transaction(), stock_checked():
+            serializer.save(created_by_id=self.request.user.id)
 
 
-class ExpenditureViewSet(viewsets.ModelViewSet):
-    serializer_class = ExpenditureSerializer
-    permission_classes = [IsAuthenticated, IsAdminOrCommander, BaseScopedPermission]
 
-    def get_queryset(self):
-        user = self.request.user
-        qs = Expenditure.objects.select_related('base', 'equipment_type')
+def _hides_usage(user):
+    # Logistics officers do not see assignment and expenditure figures.
+    return user.role == User.ROLE_LOGISTICS and not user.is_superuser
 
-        if user.is_superuser or user.role == User.ROLE_ADMIN:
-            pass
-        elif user.base:
-            qs = qs.filter(base=user.base)
-        else:
-            return Expenditure.objects.none()
 
-        params = self.request.query_params
-        base_id = params.get('base_id')
-        eq_id = params.get('equipment_type_id')
-        start = params.get('start_date')
-        end = params.get('end_date')
+def _dashboard_dates(params):
+    # Today in TIME_ZONE, the zone the range boundaries are built in.
+    return parse_date_range(params, default_end=timezone.localdate())
 
-        if base_id:
-            qs = qs.filter(base_id=base_id)
-        if eq_id:
-            qs = qs.filter(equipment_type_id=eq_id)
-        if start:
-            qs = qs.filter(expended_at__date__gte=start)
-        if end:
-            qs = qs.filter(expended_at__date__lte=end)
 
-        return qs
+def _sees_every_base(user):
+    # Everyone else sees the dashboards of their own base only.
+    return user.is_superuser or user.role == User.ROLE_ADMIN
 
-    def perform_create(self, serializer):
-        user = self.request.user
-        base = serializer.validated_data['base']
-        if not (user.is_superuser or user.role == User.ROLE_ADMIN):
-            if user.base is None or user.base != base:
-                raise PermissionError("You can only record expenditures for your own base.")
-        serializer.save(created_by=user)
 
+def _no_base():
+    return Response({"detail": "No base assigned to user."}, status=400)
 
 
-class DashboardView(APIView):
-   
-    permission_classes = [IsAuthenticated, IsAdminCommanderOrLogistics]
+def _other_base():
+    return Response({"detail": "You can only view your own base."}, status=403)
 
-    def get(self, request, format=None):
-        user = request.user
 
-        base_id = request.query_params.get('base_id')
-        eq_id = request.query_params.get('equipment_type_id')
-        start_date_str = request.query_params.get('start_date')
-        end_date_str = request.query_params.get('end_date')
-
-        today = datetime.utcnow().date()
-        start_date = parse_date(start_date_str) if start_date_str else None
-        end_date = parse_date(end_date_str) if end_date_str else today
-
-        base_qs = Base.objects.all()
-        if base_id:
-            base_qs = base_qs.filter(id=base_id)
-        elif not (user.is_superuser or user.role == User.ROLE_ADMIN):
-            if user.base:
-                base_qs = base_qs.filter(id=user.base.id)
-            else:
-                return Response({"detail": "No base assigned to user."}, status=400)
-
-        equipment_qs = EquipmentType.objects.all()
-        if eq_id:
-            equipment_qs = equipment_qs.filter(id=eq_id)
-
-        base = base_qs.first()
-        equipment = equipment_qs.first()
-
-        if not base or not equipment:
-            return Response(
-                {"detail": "Base or EquipmentType not found/ambiguous."},
-                status=400,
-            )
-        
-        def date_filter(qs, field_name, start=None, end=None):
-            if start:
-                qs = qs.filter(**{f"{field_name}__date__gte": start})
-            if end:
-                qs = qs.filter(**{f"{field_name}__date__lte": end})
-            return qs
+def _dashboard_subject(user, base_id, eq_id, bases=None, equipment_types=None):
+    """
+    Resolve the (base, equipment_type) a dashboard request is about, from
+    the reference caches or from ``current()`` maps already fetched.
+    """
+    if not (_sees_every_base(user) or user.base_id):
+        return None, None, _no_base()
+    if base_id:
+        base = refcache.bases.get(base_id, bases)
+        if base and not _sees_every_base(user) and base.id != user.base_id:
+            return None, None, _other_base()
+    elif _sees_every_base(user):
+        base = refcache.bases.first(bases)
+    else:
+        base = refcache.bases.get(user.base_id, bases)
 
-        if start_date:
-            purchases_before = Purchase.objects.filter(
-                base=base,
-                equipment_type=equipment,
-                purchased_at__date__lt=start_date,
-            ).aggregate(total=Sum("quantity"))["total"] or 0
-
-            transfers_in_before = Transfer.objects.filter(
-                to_base=base,
-                equipment_type=equipment,
-                transfer_at__date__lt=start_date,
-            ).aggregate(total=Sum("quantity"))["total"] or 0
-
-            transfers_out_before = Transfer.objects.filter(
-                from_base=base,
-                equipment_type=equipment,
-                transfer_at__date__lt=start_date,
-            ).aggregate(total=Sum("quantity"))["total"] or 0
-
-            assignments_before = Assignment.objects.filter(
-                base=base,
-                equipment_type=equipment,
-                assigned_at__date__lt=start_date,
-            ).aggregate(total=Sum("quantity"))["total"] or 0
-
-            expenditures_before = Expenditure.objects.filter(
-                base=base,
-                equipment_type=equipment,
-                expended_at__date__lt=start_date,
-            ).aggregate(total=Sum("quantity"))["total"] or 0
-
-            opening_balance = (
-                purchases_before
-                + transfers_in_before
-                - transfers_out_before
-                - assignments_before
-                - expenditures_before
-            )
-        else:
-            opening_balance = 0
+    if eq_id:
+        equipment = refcache.equipment_types.get(eq_id, equipment_types)
+    else:
+        equipment = refcache.equipment_types.first(equipment_types)
 
-        purchases_qs = date_filter(
-            Purchase.objects.filter(base=base, equipment_type=equipment),
-            "purchased_at",
-            start_date,
-            end_date,
+    if not base or not equipment:
+        return None, None, Response(
+            {"detail": "Base or EquipmentType not found/ambiguous."},
+            status=400,
         )
-        transfers_in_qs = date_filter(
-            Transfer.objects.filter(to_base=base, equipment_type=equipment),
-            "transfer_at",
-            start_date,
-            end_date,
-        )
-        transfers_out_qs = date_filter(
-            Transfer.objects.filter(from_base=base, equipment_type=equipment),
-            "transfer_at",
-            start_date,
-            end_date,
-        )
-        assignments_qs = date_filter(
-            Assignment.objects.filter(base=base, equipment_type=equipment),
-            "assigned_at",
-            start_date,
-            end_date,
+    return base, equipment, None
+
+
+def summarize_totals(totals, start_date, hide_usage=False):
+    before = totals["before"]
+    in_range = totals["in_range"]
+
+    opening_balance = balance_of(before) if start_date else 0
+    purchases_total = in_range["purchases"]
+    transfers_in_total = in_range["transfers_in"]
+    transfers_out_total = in_range["transfers_out"]
+    assigned_total = 0 if hide_usage else in_range["assigned"]
+    expended_total = 0 if hide_usage else in_range["expended"]
+
+    net_movement = purchases_total + transfers_in_total - transfers_out_total
+    closing_balance = (
+        opening_balance
+        + net_movement
+        - assigned_total
+        - expended_total
+    )
+
+    return {
+        "opening_balance": opening_balance,
+        "closing_balance": closing_balance,
+        "net_movement": {
+            "total": net_movement,
+            "purchases": purchases_total,
+            "transfers_in": transfers_in_total,
+            "transfers_out": transfers_out_total,
+        },
+        "assigned_total": assigned_total,
+        "expended_total": expended_total,
+    }
+
+
+class DashboardView(ReplicaReadMixin, ConditionalGetMixin, APIView):
+   
+    def get(self, request, format=None):
+        return self.conditional_response(request, lambda: self.summary(request))
+
+    def get_version_scope(self, request):
+        base, _, error = _dashboard_subject(
+            request.user,
+            request.query_params.get('base_id'),
+            request.query_params.get('equipment_type_id'),
         )
-        expenditures_qs = date_filter(
-            Expenditure.objects.filter(base=base, equipment_type=equipment),
-            "expended_at",
-            start_date,
-            end_date,
+        return None if error else [base.id]
+
+    def get_validator_extra(self, request):
+        # The default end date moves with the calendar; names come from the
+        # reference tables.
+        return (
+            *_dashboard_dates(request.query_params),
+            refcache.bases.version, refcache.equipment_types.version,
         )
 
-        purchases_total = purchases_qs.aggregate(total=Sum("quantity"))["total"] or 0
-        transfers_in_total = transfers_in_qs.aggregate(total=Sum("quantity"))["total"] or 0
-        transfers_out_total = transfers_out_qs.aggregate(total=Sum("quantity"))["total"] or 0
-        assigned_total = assignments_qs.aggregate(total=Sum("quantity"))["total"] or 0
-        expended_total = expenditures_qs.aggregate(total=Sum("quantity"))["total"] or 0
+    def summary(self, request):
+        user = request.user
 
-        net_movement = purchases_total + transfers_in_total - transfers_out_total
+        base_id = request.query_params.get('base_id')
+        eq_id = request.query_params.get('equipment_type_id')
+        start_date, end_date = _dashboard_dates(request.query_params)
+
+        base, equipment, error = _dashboard_subject(user, base_id, eq_id)
+        if error:
+            return error
+
+        hide_usage = _hides_usage(user)
+        data = dashboard_cache.fetch(
+            base.id,
+            (equipment.id, start_date, end_date, hide_usage,
+             refcache.bases.version, refcache.equipment_types.version),
+            lambda: self.render(base, equipment, start_date, end_date, hide_usage),
+        )
+        return Response(data)
 
-        if user.role == User.ROLE_LOGISTICS and not user.is_superuser:
-            assigned_total = 0
-            expended_total = 0
+    def render(self, base, equipment, start_date, end_date, hide_usage):
+        totals = dashboard_totals(base.id, equipment.id, start_date, end_date)
+        return self.render_totals(base, equipment, start_date, end_date, totals, hide_usage)
 
-        closing_balance = (
-            opening_balance
-            + net_movement
-            - assigned_total
-            - expended_total
-        )
+    @staticmethod
+    def render_totals(base, equipment, start_date, end_date, totals, hide_usage):
+        summary = summarize_totals(totals, start_date, hide_usage=hide_usage)
 
-        data = {
+        return {
             "base": {
                 "id": base.id,
                 "name": base.name,
@@ -365,18 +314,168 @@ class DashboardView(APIView):
                 "start_date": str(start_date) if start_date else None,
                 "end_date": str(end_date) if end_date else None,
             },
-            "opening_balance": opening_balance,
-            "closing_balance": closing_balance,
-            "net_movement": {
-                "total": net_movement,
-                "purchases": purchases_total,
-                "transfers_in": transfers_in_total,
-                "transfers_out": transfers_out_total,
-            },
-            "assigned_total": assigned_total,
-            "expended_total": expended_total,
+            **summary,
         }
 
-        return Response(data)
 
+class AsyncDashboardView(ConditionalGetMixin, AsyncAPIView):
+    """
+    ``DashboardView`` for ASGI servers: the same response, validators and
+    cache entries, with the totals statements issued together through the
+    async ORM (see ``adashboard_totals``).
+    """
+
+    async def get(self, request, format=None):
+        # Reload stale reference data on a thread now, so resolving the
+        # subject below never queries from the event loop.
+        self.subject = _dashboard_subject(
+            request.user,
+            request.query_params.get('base_id'),
+            request.query_params.get('equipment_type_id'),
+            await refcache.bases.acurrent(),
+            await refcache.equipment_types.acurrent(),
+        )
+        return await self.aconditional_response(request, lambda: self.summary(request))
+
+    def get_replica_scope(self, request):
+        # Decided before get() resolves the subject: the requested or own base.
+        return super().get_version_scope(request)
+
+    def get_version_scope(self, request):
+        base, _, error = self.subject
+        return None if error else [base.id]
+
+    def get_validator_extra(self, request):
+        return (
+            *_dashboard_dates(request.query_params),
+            refcache.bases.version, refcache.equipment_types.version,
+        )
+
+    async def summary(self, request):
+        base, equipment, error = self.subject
+        if error:
+            return json_response(error.data, status=error.status_code)
+
+        start_date, end_date = _dashboard_dates(request.query_params)
+        hide_usage = _hides_usage(request.user)
+        data = await dashboard_cache.afetch(
+            base.id,
+            (equipment.id, start_date, end_date, hide_usage,
+             refcache.bases.version, refcache.equipment_types.version),
+            lambda: self.render(base, equipment, start_date, end_date, hide_usage),
+        )
+        return json_response(data)
+
+    async def render(self, base, equipment, start_date, end_date, hide_usage):
+        totals = await adashboard_totals(base.id, equipment.id, start_date, end_date)
+        return DashboardView.render_totals(base, equipment, start_date, end_date, totals, hide_usage)
+
+
+class DashboardCacheStatsView(APIView):
+    """Hit and miss counts of the dashboard response cache (admins only)."""
+
+    allowed_roles = [User.ROLE_ADMIN]
+
+    def get(self, request, format=None):
+        return Response(dashboard_cache.stats())
+
+    def delete(self, request, format=None):
+        dashboard_cache.reset_stats()
+        return Response(status=204)
+
+
+class DashboardMatrixView(ReplicaReadMixin, APIView):
+    """Dashboard figures for every visible (base, equipment_type) pair with activity."""
+
+    def get(self, request, format=None):
+        user = request.user
+        base_id = parse_id(request.query_params, 'base_id')
+        eq_id = parse_id(request.query_params, 'equipment_type_id')
+        start_date, end_date = _dashboard_dates(request.query_params)
+
+        if _sees_every_base(user):
+            base_ids = [base_id] if base_id else None
+        elif not user.base_id:
+            return _no_base()
+        elif base_id and base_id != user.base_id:
+            return _other_base()
+        else:
+            base_ids = [user.base_id]
+
+        matrix = dashboard_matrix(base_ids, eq_id, start_date, end_date)
+        hide_usage = _hides_usage(user)
+        rows = [
+            {
+                "base_id": pair_base_id,
+                "equipment_type_id": pair_equipment_type_id,
+                **summarize_totals(totals, start_date, hide_usage=hide_usage),
+            }
+            for (pair_base_id, pair_equipment_type_id), totals in sorted(matrix.items())
+        ]
+
+        return Response({
+            "filters": {
+                "start_date": str(start_date) if start_date else None,
+                "end_date": str(end_date) if end_date else None,
+            },
+            "results": rows,
+        })
+
+
+class DashboardTrendView(ReplicaReadMixin, APIView):
+    """Dashboard movements bucketed by day, week or month, with the running balance."""
 
+    def get(self, request, format=None):
+        user = request.user
+        base_id = request.query_params.get('base_id')
+        eq_id = request.query_params.get('equipment_type_id')
+        interval = request.query_params.get('interval', 'day')
+        start_date, end_date = _dashboard_dates(request.query_params)
+
+        if interval not in TREND_INTERVALS:
+            return Response(
+                {"detail": f"interval must be one of: {', '.join(TREND_INTERVALS)}."},
+                status=400,
+            )
+
+        base, equipment, error = _dashboard_subject(user, base_id, eq_id)
+        if error:
+            return error
+
+        hide_usage = _hides_usage(user)
+        opening_balance = 0
+        if start_date:
+            totals = dashboard_totals(base.id, equipment.id, start_date, end_date)
+            opening_balance = balance_of(totals["before"])
+
+        periods = dashboard_trend(base.id, equipment.id, start_date, end_date, interval)
+        balances = running_balances(opening_balance, periods, hide_usage=hide_usage)
+
+        rows = [
+            {
+                "period": str(period),
+                "purchases": buckets["purchases"],
+                "transfers_in": buckets["transfers_in"],
+                "transfers_out": buckets["transfers_out"],
+                "assigned": 0 if hide_usage else buckets["assigned"],
+                "expended": 0 if hide_usage else buckets["expended"],
+                "balance": balance,
+            }
+            for (period, buckets), balance in zip(periods, balances)
+        ]
+
+        return Response({
+            "base": {"id": base.id, "name": base.name, "code": base.code},
+            "equipment_type": {
+                "id": equipment.id,
+                "name": equipment.name,
+                "category": equipment.category,
+            },
+            "filters": {
+                "start_date": str(start_date) if start_date else None,
+                "end_date": str(end_date) if end_date else None,
+                "interval": interval,
+            },
+            "opening_balance": opening_balance,
+            "results": rows,
+        })
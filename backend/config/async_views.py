@@ -0,0 +1,73 @@
+"""
+Read-only API views that run on the event loop under ASGI.
+
+DRF dispatches synchronously, so under ASGI every APIView request is handed
+to a worker thread and its queries run one after another. ``AsyncAPIView``
+keeps the request on the event loop: it authenticates with
+``ClaimsJWTAuthentication.aauthenticate``, applies the same route roles as
+``RoleRoutePermission``, and renders JSON and errors the way DRF does, so an
+async view can answer exactly like its sync counterpart. Under WSGI Django
+runs it through ``async_to_sync``; it works there but gains nothing.
+"""
+from django.http import HttpResponse
+from django.views import View
+from rest_framework.exceptions import APIException, AuthenticationFailed, NotAuthenticated, PermissionDenied
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from accounts.authentication import ClaimsJWTAuthentication
+from accounts.permissions import roles_for
+from .database import SAFE_METHODS, replica_caught_up, replica_reads
+
+
+def json_response(data, status=200):
+    return HttpResponse(JSONRenderer().render(data), status=status, content_type='application/json')
+
+
+class AsyncAPIView(View):
+    """
+    Base for async views. Handlers are ``async def`` and receive a DRF
+    ``Request`` (``query_params``, claims-based ``user``); safe-method requests
+    read from the replica once it has caught up, as with ``ReplicaReadMixin``.
+    """
+
+    http_method_names = ['get', 'head', 'options']
+    authentication_class = ClaimsJWTAuthentication
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.request = request = Request(request, authenticators=())
+        try:
+            await self.initial(request)
+            use_replica = request.method in SAFE_METHODS and replica_caught_up(
+                self.get_replica_scope(request)
+            )
+            with replica_reads(use_replica):
+                return await super().dispatch(request, *args, **kwargs)
+        except APIException as exc:
+            return self.handle_exception(exc)
+
+    async def initial(self, request):
+        result = await self.authentication_class().aauthenticate(request)
+        if result is None:
+            raise NotAuthenticated()
+        request.user, request.auth = result
+        if not (request.user.is_superuser or request.user.role in self.get_roles(request)):
+            raise PermissionDenied()
+
+    def get_replica_scope(self, request):
+        """Base ids the response reads, or None for every base: by default its ETag scope."""
+        get_version_scope = getattr(self, 'get_version_scope', None)
+        return get_version_scope(request) if get_version_scope else None
+
+    def get_roles(self, request):
+        roles = getattr(request, 'route_roles', None)
+        if roles is None:
+            roles = roles_for(type(self), request.method)
+        return roles
+
+    def handle_exception(self, exc):
+        data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+        response = json_response(data, status=exc.status_code)
+        if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+            response['WWW-Authenticate'] = self.authentication_class().authenticate_header(self.request)
+        return response
@@ -0,0 +1,69 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from accounts.models import User
+from assets import versions
+
+
+class ConditionalGetMixin:
+    """
+    Answer GETs with 304 Not Modified when nothing they depend on changed.
+
+    The validator is built from per-base change versions (``assets.versions``)
+    plus the query string and who is asking, so it costs a cache lookup and
+    no database query or serialization. Views narrow the bases involved with
+    ``get_version_scope`` and add other inputs with ``get_validator_extra``.
+    ``ETag`` is the exact validator; ``Last-Modified`` has one-second
+    resolution, so clients should prefer ``If-None-Match``.
+    """
+
+    def get_version_scope(self, request):
+        """Base ids the response depends on, or None for every base."""
+        user = request.user
+        if not (user.is_superuser or user.role == User.ROLE_ADMIN):
+            return [user.base_id]
+        base_id = request.query_params.get('base_id')
+        return [base_id] if base_id else None
+
+    def get_validator_extra(self, request):
+        return ()
+
+    def conditional_response(self, request, respond):
+        etag, last_modified = self.get_validators(request)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = respond()
+        return self.add_validators(response, etag, last_modified)
+
+    async def aconditional_response(self, request, respond):
+        """``conditional_response`` for async views; ``respond`` is a coroutine function."""
+        etag, last_modified = self.get_validators(request)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = await respond()
+        return self.add_validators(response, etag, last_modified)
+
+    def get_validators(self, request):
+        user = request.user
+        changes = versions.current(self.get_version_scope(request))
+        parts = (
+            type(self).__name__, request.get_full_path(),
+            user.pk, user.role, user.base_id, user.is_superuser,
+            *changes, *self.get_validator_extra(request),
+        )
+        etag = quote_etag(hashlib.md5(repr(parts).encode()).hexdigest())
+        return etag, max(changes) // 1_000_000_000
+
+    def add_validators(self, response, etag, last_modified):
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ('Authorization',))
+        return response
+
+    def list(self, request, *args, **kwargs):
+        respond = super().list
+        return self.conditional_response(request, lambda: respond(request, *args, **kwargs))
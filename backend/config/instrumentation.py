@@ -0,0 +1,152 @@
+"""
+Opt-in per-request SQL instrumentation (SQL_INSTRUMENTATION=1).
+
+Every request gets a ``Server-Timing`` header with its SQL time and query
+count, the Python time around them, and the request total, which browser
+dev tools show next to the request. Requests slower than SLOW_REQUEST_MS
+are also written to the ``config.instrumentation`` logger as one JSON
+object: the slowest statements, the statement repeated most often (an N+1
+shows up as one SELECT repeated once per row) and the ``EXPLAIN`` plan of
+the slowest SELECT.
+
+Queries are counted on the connections of the thread running the view; the
+pool threads of ``ASYNC_PARALLEL_READS`` are not included.
+"""
+import heapq
+import json
+import logging
+import time
+from collections import Counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError, connections
+
+from .metrics import wrap_queries
+
+logger = logging.getLogger(__name__)
+
+
+class QueryRecorder:
+    """An ``execute_wrapper`` that keeps the count, total time and slowest statements."""
+
+    def __init__(self, keep=3):
+        self.keep = keep
+        self.count = 0
+        self.seconds = 0.0
+        self.slowest = []
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.seconds += elapsed
+            self.statements[sql] += 1
+            entry = (elapsed, self.count, sql, params, context['connection'].alias, many)
+            if len(self.slowest) < self.keep:
+                heapq.heappush(self.slowest, entry)
+            else:
+                heapq.heappushpop(self.slowest, entry)
+
+    def slowest_first(self):
+        return sorted(self.slowest, reverse=True)
+
+    def most_repeated(self):
+        if not self.statements:
+            return None
+        sql, times = self.statements.most_common(1)[0]
+        return {'sql': sql, 'times': times}
+
+
+def explain(alias, sql, params):
+    """The plan of one SELECT as text, or None for other statements."""
+    if not sql.lstrip().upper().startswith('SELECT'):
+        return None
+    connection = connections[alias]
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+            return '\n'.join(' '.join(str(col) for col in row) for row in cursor.fetchall())
+    except DatabaseError as exc:
+        return f'EXPLAIN failed: {exc}'
+
+
+class SQLInstrumentationMiddleware:
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SQL_INSTRUMENTATION', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.slow_ms = getattr(settings, 'SLOW_REQUEST_MS', 500)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder = QueryRecorder(keep=getattr(settings, 'SLOW_REQUEST_STATEMENTS', 3))
+        started = time.perf_counter()
+        with wrap_queries(recorder):
+            response = self.get_response(request)
+        total_ms = (time.perf_counter() - started) * 1000
+
+        self.add_timings(response, recorder, total_ms)
+        if total_ms >= self.slow_ms:
+            self.log_slow_request(request, response, recorder, total_ms)
+        return response
+
+    async def __acall__(self, request):
+        recorder = QueryRecorder(keep=getattr(settings, 'SLOW_REQUEST_STATEMENTS', 3))
+        started = time.perf_counter()
+        stack = await sync_to_async(wrap_queries)(recorder)
+        try:
+            response = await self.get_response(request)
+            total_ms = (time.perf_counter() - started) * 1000
+        finally:
+            await sync_to_async(stack.close)()
+
+        self.add_timings(response, recorder, total_ms)
+        if total_ms >= self.slow_ms:
+            # EXPLAIN runs on the connection of the request's ORM thread.
+            await sync_to_async(self.log_slow_request)(request, response, recorder, total_ms)
+        return response
+
+    def add_timings(self, response, recorder, total_ms):
+        sql_ms = recorder.seconds * 1000
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={sql_ms:.1f};desc="{recorder.count} queries"',
+            f'app;dur={total_ms - sql_ms:.1f}',
+            f'total;dur={total_ms:.1f}',
+        ])
+
+    def log_slow_request(self, request, response, recorder, total_ms):
+        sql_ms = recorder.seconds * 1000
+        slowest = recorder.slowest_first()
+        record = {
+            'method': request.method,
+            'path': request.get_full_path(),
+            'view': getattr(request.resolver_match, 'view_name', None),
+            'status': response.status_code,
+            'user_id': getattr(getattr(request, 'user', None), 'pk', None),
+            'total_ms': round(total_ms, 2),
+            'sql_ms': round(sql_ms, 2),
+            'python_ms': round(total_ms - sql_ms, 2),
+            'queries': recorder.count,
+            'most_repeated': recorder.most_repeated(),
+            'slowest': [
+                {'ms': round(elapsed * 1000, 2), 'alias': alias, 'sql': sql}
+                for elapsed, _, sql, _, alias, _ in slowest
+            ],
+        }
+        if slowest:
+            _, _, sql, params, alias, many = slowest[0]
+            record['explain'] = None if many else explain(alias, sql, params)
+        logger.warning(json.dumps(record, default=str))
@@ -0,0 +1,261 @@
+"""
+Request, database and cache metrics in the Prometheus text format, at /metrics.
+
+Every request is counted and timed under its resolved view name
+(``purchase-list``, ``dashboard``, ...; ``unresolved`` for 404s), with its
+response size and the number and time of its SQL statements. The reference
+and dashboard caches count their hits and misses here too.
+
+Each process keeps its samples in memory. With METRICS_DIR set they are also
+written, at most every METRICS_FLUSH_SECONDS, to a file of that process's
+own in the directory, and a scrape adds up every file there, so all workers
+of a gunicorn/uvicorn server report one total whichever of them answers.
+Files of exited workers are kept so counters never go backwards: empty the
+directory when the server (re)starts. Without METRICS_DIR a scrape only sees
+the process that serves it.
+"""
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed, PermissionDenied
+from django.db import connections
+from django.http import HttpResponse
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# name -> (type, help, label names, buckets)
+METRICS = {
+    'http_requests_total': (
+        'counter', 'Requests by view, method and status.', ('view', 'method', 'status'), None,
+    ),
+    'http_request_duration_seconds': ('histogram', 'Request latency by view.', ('view',), LATENCY_BUCKETS),
+    'http_response_size_bytes': ('histogram', 'Response body size by view.', ('view',), SIZE_BUCKETS),
+    'db_queries_total': ('counter', 'SQL statements run by requests, by view.', ('view',), None),
+    'db_query_duration_seconds_total': ('counter', 'Time spent in SQL by requests, by view.', ('view',), None),
+    'cache_requests_total': ('counter', 'Cache lookups by cache and result.', ('cache', 'result'), None),
+}
+
+
+class Samples:
+    """This process's samples: ``{name: {labels: value}}``, histograms as bucket lists."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = defaultdict(dict)
+        self.flushed_at = time.monotonic()
+        self.started(os.getpid())
+
+    def started(self, pid):
+        self.pid = pid
+        self.file_name = f'{pid}-{time.time_ns()}.json'
+
+    def forked(self):
+        """Start afresh in a worker forked after import (gunicorn --preload)."""
+        if os.getpid() != self.pid:
+            with self.lock:
+                if os.getpid() != self.pid:
+                    self.values.clear()
+                    self.started(os.getpid())
+
+    def inc(self, name, labels, amount=1):
+        self.forked()
+        with self.lock:
+            series = self.values[name]
+            series[labels] = series.get(labels, 0) + amount
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][3]
+        self.forked()
+        with self.lock:
+            series = self.values[name]
+            # Per-bucket counts plus the sum; made cumulative on export.
+            counts = series.setdefault(labels, [0] * (len(buckets) + 1) + [0.0])
+            counts[next((i for i, bound in enumerate(buckets) if value <= bound), len(buckets))] += 1
+            counts[-1] += value
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                name: [[list(labels), value if isinstance(value, (int, float)) else list(value)]
+                       for labels, value in series.items()]
+                for name, series in self.values.items()
+            }
+
+    def flush(self, force=False):
+        directory = getattr(settings, 'METRICS_DIR', None)
+        if not directory:
+            return
+        interval = getattr(settings, 'METRICS_FLUSH_SECONDS', 5.0)
+        if not force and time.monotonic() - self.flushed_at < interval:
+            return
+        self.flushed_at = time.monotonic()
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        target = directory / self.file_name
+        scratch = target.with_suffix('.tmp')
+        scratch.write_text(json.dumps(self.snapshot()))
+        os.replace(scratch, target)
+
+    def reset(self):
+        with self.lock:
+            self.values.clear()
+
+
+samples = Samples()
+
+
+def count_cache(cache, hit):
+    samples.inc('cache_requests_total', (cache, 'hit' if hit else 'miss'))
+
+
+def collect():
+    """Every process's samples added up: ``{name: {labels: value}}``."""
+    directory = getattr(settings, 'METRICS_DIR', None)
+    if not directory:
+        snapshots = [samples.snapshot()]
+    else:
+        samples.flush(force=True)
+        snapshots = []
+        for path in Path(directory).glob('*.json'):
+            try:
+                snapshots.append(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                # Removed or being replaced by its worker: the next scrape has it.
+                continue
+
+    totals = defaultdict(dict)
+    for snapshot in snapshots:
+        for name, series in snapshot.items():
+            for labels, value in series:
+                labels = tuple(labels)
+                if isinstance(value, list):
+                    current = totals[name].get(labels) or [0] * len(value)
+                    totals[name][labels] = [a + b for a, b in zip(current, value)]
+                else:
+                    totals[name][labels] = totals[name].get(labels, 0) + value
+    return totals
+
+
+def _labels(names, values, extra=''):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(totals):
+    """The exposition text for ``collect()``'s totals."""
+    lines = []
+    for name, (kind, help_text, names, buckets) in METRICS.items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+        for labels, value in sorted(totals.get(name, {}).items()):
+            if kind != 'histogram':
+                lines.append(f'{name}{_labels(names, labels)} {_number(value)}')
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets + ('+Inf',), value[:-1]):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f'{name}_bucket{_labels(names, labels, le)} {cumulative}')
+            lines.append(f'{name}_sum{_labels(names, labels)} {_number(value[-1])}')
+            lines.append(f'{name}_count{_labels(names, labels)} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+
+class QueryTally:
+    """An ``execute_wrapper`` that counts statements and their time."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+def wrap_queries(wrapper):
+    """
+    An ExitStack holding ``wrapper`` on every connection of this thread.
+
+    Under ASGI the ORM runs on the request's thread-sensitive thread, not the
+    event loop's: async code calls this, and closes the stack, through
+    ``sync_to_async``.
+    """
+    stack = ExitStack()
+    for connection in connections.all(initialized_only=False):
+        stack.enter_context(connection.execute_wrapper(wrapper))
+    return stack
+
+
+class MetricsMiddleware:
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        tally = QueryTally()
+        started = time.perf_counter()
+        with wrap_queries(tally):
+            response = self.get_response(request)
+        self.record(request, response, tally, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        tally = QueryTally()
+        started = time.perf_counter()
+        stack = await sync_to_async(wrap_queries)(tally)
+        try:
+            response = await self.get_response(request)
+            elapsed = time.perf_counter() - started
+        finally:
+            await sync_to_async(stack.close)()
+        self.record(request, response, tally, elapsed)
+        return response
+
+    def record(self, request, response, tally, elapsed):
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unresolved'
+        samples.inc('http_requests_total', (view, request.method, str(response.status_code)))
+        samples.observe('http_request_duration_seconds', (view,), elapsed)
+        if not response.streaming:
+            samples.observe('http_response_size_bytes', (view,), len(response.content))
+        samples.inc('db_queries_total', (view,), tally.count)
+        samples.inc('db_query_duration_seconds_total', (view,), tally.seconds)
+        samples.flush()
+
+
+def metrics_view(request):
+    """Scrapes are allowed from METRICS_ALLOWED_IPS only."""
+    if request.META.get('REMOTE_ADDR') not in getattr(settings, 'METRICS_ALLOWED_IPS', ('127.0.0.1', '::1')):
+        raise PermissionDenied
+    return HttpResponse(render(collect()), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -1,47 +1,54 @@
-from django.http import JsonResponse
-from django.urls import resolve
-
-from accounts.models import User
-
-class RoleBasedAccessMiddleware:
+from django.urls import URLPattern, URLResolver, get_resolver
+from django.utils.deprecation import MiddlewareMixin
+
+from accounts.permissions import roles_for
+
+
+def compile_route_roles(urlconf=None):
+    """
+    Map ``(view_name, METHOD)`` to the roles allowed there, for every class-based
+    view in the URLconf, from the roles each view class declares.
+    """
+    route_roles = {}
+
+    def walk(patterns, namespace):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                ns = f'{namespace}{pattern.namespace}:' if pattern.namespace else namespace
+                walk(pattern.url_patterns, ns)
+            elif isinstance(pattern, URLPattern) and pattern.name:
+                view_cls = getattr(pattern.callback, 'cls', None) or getattr(
+                    pattern.callback, 'view_class', None
+                )
+                if view_cls is None:
+                    continue
+                actions = getattr(pattern.callback, 'actions', None) or {
+                    method: None for method in view_cls.http_method_names
+                }
+                for method, action in actions.items():
+                    route_roles[(f'{namespace}{pattern.name}', method.upper())] = roles_for(
+                        view_cls, method.upper(), action
+                    )
+
+    walk(get_resolver(urlconf).url_patterns, '')
+    return route_roles
+
+
+class RoleBasedAccessMiddleware(MiddlewareMixin):
+    """
+    Attach the roles allowed for the matched route to ``request.route_roles``.
+
+    The table is compiled once when the middleware loads, and the route is
+    taken from the dispatcher's own ``resolver_match``, so each request costs
+    one dict lookup. ``accounts.permissions.RoleRoutePermission`` enforces it
+    after DRF has authenticated the token.
+    """
 
     def __init__(self, get_response):
-        self.get_response = get_response
-        self.route_roles = {
-            'base-list': [User.ROLE_ADMIN],
-            'base-detail': [User.ROLE_ADMIN],
-            'equipmenttype-list': [User.ROLE_ADMIN],
-            'equipmenttype-detail': [User.ROLE_ADMIN],
-            'purchase-list': [User.ROLE_ADMIN, User.ROLE_COMMANDER, User.ROLE_LOGISTICS],
-            'purchase-detail': [User.ROLE_ADMIN, User.ROLE_COMMANDER, User.ROLE_LOGISTICS],
-            'transfer-list': [User.ROLE_ADMIN, User.ROLE_COMMANDER, User.ROLE_LOGISTICS],
-            'transfer-detail': [User.ROLE_ADMIN, User.ROLE_COMMANDER, User.ROLE_LOGISTICS],
-            'assignment-list': [User.ROLE_ADMIN, User.ROLE_COMMANDER],
-            'assignment-detail': [User.ROLE_ADMIN, User.ROLE_COMMANDER],
-            'expenditure-list': [User.ROLE_ADMIN, User.ROLE_COMMANDER],
-            'expenditure-detail': [User.ROLE_ADMIN, User.ROLE_COMMANDER],
-            'dashboard': [User.ROLE_ADMIN, User.ROLE_COMMANDER, User.ROLE_LOGISTICS],
-            'transactionlog-list': [User.ROLE_ADMIN, User.ROLE_COMMANDER, User.ROLE_LOGISTICS],
-            'transactionlog-detail': [User.ROLE_ADMIN, User.ROLE_COMMANDER, User.ROLE_LOGISTICS],
-        }
-
-    def __call__(self, request):
-        try:
-            resolver_match = resolve(request.path_info)
-        except Exception:
-            return self.get_response(request)
-
-        view_name = resolver_match.view_name
-        allowed_roles = self.route_roles.get(view_name)
-
-        if not allowed_roles:
-            return self.get_response(request)
-
-        user = request.user
-        if not user.is_authenticated:
-            return JsonResponse({'detail': 'Authentication required'}, status=401)
-
-        if user.is_superuser or user.role in allowed_roles:
-            return self.get_response(request)
-
-        return JsonResponse({'detail': 'Forbidden: insufficient role'}, status=403)
+        super().__init__(get_response)
+        self.route_roles = compile_route_roles()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.route_roles = self.route_roles.get(
+            (request.resolver_match.view_name, request.method)
+        )
@@ -0,0 +1,145 @@
+import base64
+import heapq
+import json
+from collections import OrderedDict
+from collections.abc import Mapping
+from itertools import islice
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Newest-first cursor pagination keyed on (``view.keyset_field``, id).
+
+    Each page is a range condition on the ordering columns instead of an
+    OFFSET, so deep pages cost the same as the first one. An iterable of
+    dicts is paged the same way in Python. So is a callable taking
+    ``before=<cursor position>`` and yielding dicts newest first (archived
+    rows); it is read only as far as one page.
+    """
+
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 50
+    max_page_size = 500
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        position = self.start(request, view)
+        if hasattr(queryset, 'order_by'):
+            page = list(self.page_queryset(queryset, position))
+        else:
+            page = self.newest_rows(queryset, position)
+        return self.finish(page)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """``paginate_queryset`` for async views, fetching the page with ``async for``."""
+        position = self.start(request, view)
+        return self.finish([obj async for obj in self.page_queryset(queryset, position)])
+
+    def start(self, request, view):
+        self.request = request
+        self.field = getattr(view, 'keyset_field', 'id')
+        self.page_size = self.get_page_size(request)
+        return self.decode_cursor(request)
+
+    def page_queryset(self, queryset, position):
+        ordering = ['-id'] if self.field == 'id' else [f'-{self.field}', '-id']
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.after(*position))
+        return queryset[:self.page_size + 1]
+
+    def finish(self, page):
+        self.has_next = len(page) > self.page_size
+        page = page[:self.page_size]
+        self.next_position = self.position_of(page[-1]) if self.has_next else None
+        return page
+
+    def after(self, value, pk):
+        if self.field == 'id':
+            return Q(id__lt=pk)
+        # The leading `<=` bounds the index range; the OR breaks ties on id.
+        return Q(**{f'{self.field}__lte': value}) & (
+            Q(**{f'{self.field}__lt': value}) | Q(id__lt=pk)
+        )
+
+    def newest_rows(self, rows, position):
+        if callable(rows):
+            return list(islice(rows(before=position), self.page_size + 1))
+        key = (lambda row: row['id']) if self.field == 'id' else (lambda row: (row[self.field], row['id']))
+        if position is not None:
+            bound = position[1] if self.field == 'id' else position
+            rows = (row for row in rows if key(row) < bound)
+        return heapq.nlargest(self.page_size + 1, rows, key=key)
+
+    def position_of(self, obj):
+        if isinstance(obj, Mapping):
+            value, pk = obj[self.field], obj['id']
+        else:
+            value, pk = getattr(obj, self.field), obj.pk
+        return (value.isoformat() if hasattr(value, 'isoformat') else value, pk)
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            value, pk = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            if self.field != 'id':
+                # Cursors carry the aware isoformat ``position_of`` wrote.
+                value = parse_datetime(value)
+                if value is None or timezone.is_naive(value):
+                    raise ValueError(value)
+            return value, int(pk)
+        except (TypeError, ValueError, UnicodeEncodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, position):
+        encoded = base64.urlsafe_b64encode(json.dumps(position).encode('ascii')).decode('ascii')
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param, encoded
+        )
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position)
+
+    def get_first_link(self):
+        return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+
+    def get_paginated_data(self, data):
+        return OrderedDict([
+            ('next', self.get_next_link()),
+            ('first', self.get_first_link()),
+            ('results', data),
+        ])
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'first': {'type': 'string', 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,225 @@
+"""
+On-demand profiling of single requests, for admins.
+
+An admin adds ``X-Profile: 1`` (or ``?profile=1``) to any API request. It
+runs under pyinstrument's sampling profiler when that is installed, and
+under cProfile otherwise; the report is stored in PROFILE_DIR under the
+request id (``X-Request-ID`` when the client sends a usable one), which the
+response carries in ``X-Profile-Id``. ``/api/profiles/`` lists the stored
+reports and ``/api/profiles/<id>/`` returns one: the text report, or with
+``?kind=prof`` the raw cProfile stats (for snakeviz, or pyprof2calltree to
+get callgrind), ``?kind=html`` pyinstrument's page.
+
+Anyone else's flag is ignored, so the check costs nothing on normal traffic.
+"""
+import cProfile
+import io
+import marshal
+import pstats
+import re
+import time
+import uuid
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import FileResponse, Http404
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from accounts.authentication import ClaimsJWTAuthentication
+from accounts.models import User
+
+try:
+    import pyinstrument
+except ImportError:
+    pyinstrument = None
+
+REQUEST_ID = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+CONTENT_TYPES = {
+    'txt': 'text/plain; charset=utf-8',
+    'html': 'text/html; charset=utf-8',
+    'prof': 'application/octet-stream',
+}
+
+
+def profile_dir():
+    return Path(settings.PROFILE_DIR)
+
+
+def is_requested(request):
+    flag = request.headers.get('X-Profile') or request.GET.get('profile')
+    return flag not in (None, '', '0', 'false')
+
+
+def is_admin(request):
+    try:
+        result = ClaimsJWTAuthentication().authenticate(request)
+    except APIException:
+        return False
+    if result is None:
+        return False
+    user = result[0]
+    return user.is_superuser or user.role == User.ROLE_ADMIN
+
+
+def request_id(request):
+    given = request.headers.get('X-Request-ID', '')
+    return given if REQUEST_ID.match(given) else uuid.uuid4().hex
+
+
+def profile(get_response, request):
+    """Run the request under a profiler; returns the response and {kind: report}."""
+    if pyinstrument is not None:
+        profiler = pyinstrument.Profiler()
+        profiler.start()
+        try:
+            response = get_response(request)
+        finally:
+            profiler.stop()
+        return response, pyinstrument_reports(profiler)
+
+    profiler = cProfile.Profile()
+    response = profiler.runcall(get_response, request)
+    return response, cprofile_reports(profiler)
+
+
+async def aprofile(get_response, request):
+    """
+    ``profile`` for the async middleware chain. cProfile only sees the event
+    loop's thread, so work handed to ``sync_to_async`` shows as the await on
+    it, and other requests the loop runs meanwhile are counted too.
+    """
+    if pyinstrument is not None:
+        profiler = pyinstrument.Profiler(async_mode='enabled')
+        profiler.start()
+        try:
+            response = await get_response(request)
+        finally:
+            profiler.stop()
+        return response, pyinstrument_reports(profiler)
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        response = await get_response(request)
+    finally:
+        profiler.disable()
+    return response, cprofile_reports(profiler)
+
+
+def pyinstrument_reports(profiler):
+    return {'txt': profiler.output_text(), 'html': profiler.output_html()}
+
+
+def cprofile_reports(profiler):
+    text = io.StringIO()
+    stats = pstats.Stats(profiler, stream=text)
+    stats.sort_stats('cumulative').print_stats(getattr(settings, 'PROFILE_LINES', 60))
+    # The format Stats.dump_stats writes.
+    return {'txt': text.getvalue(), 'prof': marshal.dumps(stats.stats)}
+
+
+def store(profile_id, header, reports):
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    for kind, report in reports.items():
+        path = directory / f'{profile_id}.{kind}'
+        if kind == 'txt':
+            path.write_text(f'{header}\n\n{report}', encoding='utf-8')
+        elif isinstance(report, bytes):
+            path.write_bytes(report)
+        else:
+            path.write_text(report, encoding='utf-8')
+
+    # Keep the newest PROFILE_KEEP reports.
+    keep = getattr(settings, 'PROFILE_KEEP', 100)
+    reports_by_age = sorted(directory.glob('*.txt'), key=lambda path: path.stat().st_mtime, reverse=True)
+    for stale in reports_by_age[keep:]:
+        for path in directory.glob(f'{stale.stem}.*'):
+            path.unlink(missing_ok=True)
+
+
+def _first_line(path):
+    with path.open(encoding='utf-8') as report:
+        return report.readline().strip()
+
+
+class ProfilingMiddleware:
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_PROFILING', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not (is_requested(request) and is_admin(request)):
+            return self.get_response(request)
+
+        profile_id = request_id(request)
+        started = time.perf_counter()
+        response, reports = profile(self.get_response, request)
+        store(profile_id, self.header(request, response, started), reports)
+        response['X-Profile-Id'] = profile_id
+        return response
+
+    async def __acall__(self, request):
+        # is_admin() reads the role from the token's claims; the revocation
+        # check behind it queries on a token-version cache miss, hence the thread.
+        if not (is_requested(request) and await sync_to_async(is_admin)(request)):
+            return await self.get_response(request)
+
+        profile_id = request_id(request)
+        started = time.perf_counter()
+        response, reports = await aprofile(self.get_response, request)
+        await sync_to_async(store)(profile_id, self.header(request, response, started), reports)
+        response['X-Profile-Id'] = profile_id
+        return response
+
+    def header(self, request, response, started):
+        elapsed = (time.perf_counter() - started) * 1000
+        return f'{request.method} {request.get_full_path()} -> {response.status_code} in {elapsed:.1f} ms'
+
+
+class ProfileListView(APIView):
+    """Stored request profiles, newest first (admins only)."""
+
+    allowed_roles = [User.ROLE_ADMIN]
+
+    def get(self, request, format=None):
+        reports = sorted(profile_dir().glob('*.txt'), key=lambda path: path.stat().st_mtime, reverse=True)
+        return Response([
+            {
+                'id': path.stem,
+                'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(path.stat().st_mtime)),
+                'request': _first_line(path),
+                'kinds': sorted(p.suffix[1:] for p in profile_dir().glob(f'{path.stem}.*')),
+            }
+            for path in reports
+        ])
+
+
+class ProfileDetailView(APIView):
+    """One stored profile: ``?kind=txt`` (default), ``prof`` or ``html``."""
+
+    allowed_roles = [User.ROLE_ADMIN]
+
+    def get(self, request, profile_id, format=None):
+        kind = request.query_params.get('kind', 'txt')
+        if kind not in CONTENT_TYPES or not REQUEST_ID.match(profile_id):
+            raise Http404
+        path = profile_dir() / f'{profile_id}.{kind}'
+        if not path.exists():
+            raise Http404
+        return FileResponse(path.open('rb'), content_type=CONTENT_TYPES[kind],
+                            as_attachment=kind == 'prof', filename=path.name)
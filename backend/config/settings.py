@@ -11,10 +11,13 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 from dotenv import load_dotenv
 import os
+import sys
 load_dotenv()
 from pathlib import Path
 from datetime import timedelta
 
+from config.database import database_config
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -52,12 +55,16 @@ INSTALLED_APPS = [
 AUTH_USER_MODEL = 'accounts.User'
 
 MIDDLEWARE = [
+    "config.metrics.MetricsMiddleware",
+    "config.instrumentation.SQLInstrumentationMiddleware",
+    "config.profiling.ProfilingMiddleware",
      "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "config.middleware.RoleBasedAccessMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 
@@ -66,20 +73,6 @@ MIDDLEWARE = [
 ROOT_URLCONF = "config.urls"
 
 
-# DATABASES = {
-#     "default": {
-#         "ENGINE": "django.db.backends.mysql",
-#         "NAME": os.getenv("DB_NAME"),
-#         "USER": os.getenv("DB_USER"),
-#         "PASSWORD": os.getenv("DB_PASSWORD"),
-#         "HOST": os.getenv("DB_HOST"),
-#         "PORT": os.getenv("DB_PORT"),
-#         "OPTIONS": {
-#             "init_command": "SET sql_mode='STRICT_TRANS_TABLES'",
-#         },
-#     }
-# }
-
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
@@ -102,24 +95,129 @@ WSGI_APPLICATION = "config.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
-    }
-}
+# Configured from DATABASE_URL, DATABASE_REPLICA_URL and DB_CONN_MAX_AGE;
+# see config/database.py. Without them this is the local db.sqlite3.
+DATABASES = database_config(BASE_DIR)
+DATABASE_ROUTERS = ["config.database.ReplicaRouter"]
+# Reads of a base stay on the primary for this long after a write to it; keep
+# it above the replica's worst lag.
+REPLICA_LAG_SECONDS = float(os.getenv("REPLICA_LAG_SECONDS", "5"))
 
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "accounts.authentication.ClaimsJWTAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
-        "rest_framework.permissions.IsAuthenticated",
+        "accounts.permissions.RoleRoutePermission",
     ],
+    "DEFAULT_PAGINATION_CLASS": "config.pagination.KeysetPagination",
 }
 
 
+# Dashboard totals come from the incrementally maintained inventory ledger.
+# Set to 0 to aggregate the movement tables directly instead.
+INVENTORY_LEDGER_ENABLED = os.getenv("INVENTORY_LEDGER_ENABLED", "1") == "1"
+
+# The async views under api/async/ (for ASGI servers) run a request's
+# independent totals queries at once, each on its own connection, when
+# ASYNC_PARALLEL_READS=1. Unset, only server databases do; see
+# assets.inventory.parallel_reads.
+ASYNC_PARALLEL_READS = {"1": True, "0": False}.get(os.getenv("ASYNC_PARALLEL_READS", ""))
+
+# TransactionLog entries created inside a logs.writer.deferred() block are
+# bulk-inserted as it exits, before the transaction commits, in batches of at
+# most TRANSACTION_LOG_BATCH_SIZE and never held longer than
+# TRANSACTION_LOG_MAX_DELAY seconds. Set TRANSACTION_LOG_DEFERRED=0 to write
+# each entry immediately.
+TRANSACTION_LOG_DEFERRED = os.getenv("TRANSACTION_LOG_DEFERRED", "1") == "1"
+TRANSACTION_LOG_BATCH_SIZE = int(os.getenv("TRANSACTION_LOG_BATCH_SIZE", "500"))
+TRANSACTION_LOG_MAX_DELAY = float(os.getenv("TRANSACTION_LOG_MAX_DELAY", "2.0"))
+
+# Whole months of TransactionLog older than TRANSACTION_LOG_RETENTION_DAYS are
+# moved into gzip segments under TRANSACTION_LOG_ARCHIVE_DIR by `archive_logs`
+# and served from there with /api/logs/?source=archive. A positive
+# TRANSACTION_LOG_ARCHIVE_INTERVAL (hours) also runs it from a background timer.
+TRANSACTION_LOG_RETENTION_DAYS = int(os.getenv("TRANSACTION_LOG_RETENTION_DAYS", "180"))
+TRANSACTION_LOG_ARCHIVE_DIR = Path(
+    os.getenv("TRANSACTION_LOG_ARCHIVE_DIR", BASE_DIR / "log_archive")
+)
+TRANSACTION_LOG_ARCHIVE_INTERVAL = float(os.getenv("TRANSACTION_LOG_ARCHIVE_INTERVAL", "0"))
+
+# The default cache holds the reference-data and per-base change versions;
+# the dashboard alias holds rendered dashboard responses. Every worker must see
+# the others' version bumps, so the default is "file" under CACHE_DIR (or any
+# shared backend). "locmem" only suits a single process; the test runner uses
+# it so tests never touch CACHE_DIR.
+CACHE_BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+}
+TESTING = sys.argv[1:2] == ["test"]
+CACHE_BACKEND = "locmem" if TESTING else os.getenv("CACHE_BACKEND", "file")
+DASHBOARD_CACHE_BACKEND = "locmem" if TESTING else os.getenv("DASHBOARD_CACHE_BACKEND", CACHE_BACKEND)
+CACHE_DIR = Path(os.getenv("CACHE_DIR", BASE_DIR / "cache"))
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKENDS[CACHE_BACKEND],
+        "LOCATION": str(CACHE_DIR / "default") if CACHE_BACKEND == "file" else "default",
+        # Version keys never expire; keep the file backend from culling them.
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    },
+    "dashboard": {
+        "BACKEND": CACHE_BACKENDS[DASHBOARD_CACHE_BACKEND],
+        "LOCATION": str(CACHE_DIR / "dashboard") if DASHBOARD_CACHE_BACKEND == "file" else "dashboard",
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    },
+}
+DASHBOARD_CACHE_ALIAS = "dashboard"
+# Seconds a dashboard response may be reused; 0 disables the cache. Writes
+# invalidate entries sooner by bumping their base's change version.
+DASHBOARD_CACHE_TIMEOUT = int(os.getenv("DASHBOARD_CACHE_TIMEOUT", "3600"))
+
+# Opt-in per-request SQL timing: a Server-Timing header on every response, and
+# requests slower than SLOW_REQUEST_MS logged as JSON, with the EXPLAIN plan of
+# their slowest query, to SLOW_REQUEST_LOG (stderr when unset).
+SQL_INSTRUMENTATION = os.getenv("SQL_INSTRUMENTATION", "0") == "1"
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "500"))
+SLOW_REQUEST_STATEMENTS = int(os.getenv("SLOW_REQUEST_STATEMENTS", "3"))
+SLOW_REQUEST_LOG = os.getenv("SLOW_REQUEST_LOG")
+
+# Admins can profile any request with an "X-Profile: 1" header or ?profile=1.
+# The newest PROFILE_KEEP reports are kept in PROFILE_DIR and served from
+# /api/profiles/. Set REQUEST_PROFILING=0 to turn the hook off.
+REQUEST_PROFILING = os.getenv("REQUEST_PROFILING", "1") == "1"
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", BASE_DIR / "profiles"))
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "100"))
+
+# Request, SQL and cache metrics at /metrics, for scrapes from METRICS_ALLOWED_IPS.
+# Under several worker processes set METRICS_DIR to a directory they share and
+# empty it on every server start; each worker writes its samples there at most
+# every METRICS_FLUSH_SECONDS and a scrape adds them up.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+METRICS_DIR = os.getenv("METRICS_DIR")
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "5"))
+METRICS_ALLOWED_IPS = os.getenv("METRICS_ALLOWED_IPS", "127.0.0.1,::1").split(",")
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "slow_requests": (
+            {"class": "logging.FileHandler", "filename": SLOW_REQUEST_LOG}
+            if SLOW_REQUEST_LOG
+            else {"class": "logging.StreamHandler"}
+        ),
+    },
+    "loggers": {
+        "config.instrumentation": {
+            "handlers": ["slow_requests"],
+            "level": "WARNING",
+            "propagate": False,
+        },
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -167,6 +265,10 @@ SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=30),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
     "AUTH_HEADER_TYPES": ("Bearer",), 
+    # Role, base and token version travel in the token; requests do not load the user.
+    "TOKEN_USER_CLASS": "accounts.authentication.ClaimsUser",
+    "TOKEN_OBTAIN_SERIALIZER": "accounts.serializers.ClaimsTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "accounts.serializers.ClaimsTokenRefreshSerializer",
 }
 
 CORS_ALLOW_CREDENTIALS = True
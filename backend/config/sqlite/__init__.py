@@ -0,0 +1,40 @@
+"""
+SQLite tuned for concurrent use on a single node.
+
+Selected with SQLITE_TUNING=1 (see ``config.database``), which swaps the
+engine of SQLite databases for ``config.sqlite``. Its connections get the
+pragmas below (overridable with the SQLITE_PRAGMAS setting), and
+transactions opened by ``write_transaction()`` start with BEGIN IMMEDIATE.
+That takes the write lock up front and waits out busy_timeout for it,
+instead of failing with "database is locked" when a deferred transaction
+later tries to upgrade from a read lock.
+"""
+import contextvars
+from contextlib import contextmanager
+
+from django.db import transaction
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',        # readers no longer block behind the writer
+    'synchronous': 'NORMAL',      # fsync at checkpoints, not every commit
+    'mmap_size': 268435456,       # 256 MiB of memory-mapped reads
+    'cache_size': -65536,         # 64 MiB page cache (negative means KiB)
+    'busy_timeout': 5000,         # ms to wait for a lock before giving up
+}
+
+_immediate = contextvars.ContextVar('sqlite_immediate', default=False)
+
+
+def immediate_requested():
+    return _immediate.get()
+
+
+@contextmanager
+def write_transaction(using=None):
+    """``transaction.atomic()`` that opens with BEGIN IMMEDIATE on the tuned backend."""
+    token = _immediate.set(True)
+    try:
+        with transaction.atomic(using=using):
+            yield
+    finally:
+        _immediate.reset(token)
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.backends.sqlite3 import base
+
+from . import DEFAULT_PRAGMAS, immediate_requested
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute("BEGIN IMMEDIATE" if immediate_requested() else "BEGIN")
+
+
+def apply_pragmas(sender, connection, **kwargs):
+    if not isinstance(connection, DatabaseWrapper):
+        return
+    pragmas = {**DEFAULT_PRAGMAS, **getattr(settings, 'SQLITE_PRAGMAS', {})}
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+connection_created.connect(apply_pragmas, dispatch_uid='config.sqlite.apply_pragmas')
@@ -1,9 +1,15 @@
 from django.contrib import admin
 from django.urls import path, include
 
+from .metrics import metrics_view
+from .profiling import ProfileDetailView, ProfileListView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('accounts.urls')),
     path('api/', include('assets.urls')),
     path('api/', include('logs.urls')), 
+    path('api/profiles/', ProfileListView.as_view(), name='profile-list'),
+    path('api/profiles/<str:profile_id>/', ProfileDetailView.as_view(), name='profile-detail'),
+    path('metrics', metrics_view, name='metrics'),
 ]
@@ -6,3 +6,9 @@ class LogsConfig(AppConfig):
 
     def ready(self):
         from . import signals
+
+        from django.conf import settings
+        interval = getattr(settings, 'TRANSACTION_LOG_ARCHIVE_INTERVAL', 0)
+        if interval > 0:
+            from .archive import start_scheduler
+            start_scheduler(interval)
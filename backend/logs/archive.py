@@ -0,0 +1,254 @@
+"""
+Cold storage for old TransactionLog rows.
+
+Rows older than the retention window move, a whole month at a time, into
+append-only gzip segments under TRANSACTION_LOG_ARCHIVE_DIR:
+
+    2025-01.ndjson.gz   one JSON object per row, one gzip member per append
+    2025-01.idx.json    sidecar: row count, id and timestamp bounds, bases
+
+A segment is appended and fsynced, then its sidecar, which records the
+segment's length, is replaced atomically, and only then are the rows
+deleted from the table. If a run stops part way, the next one cuts the
+segment back to the recorded length (dropping an append its sidecar never
+confirmed), skips rows at or below the sidecar's ``max_id`` and finishes
+the delete, so nothing is written twice or lost. Runs hold an flock on
+``.archive.lock`` in the directory, so only one writes at a time.
+"""
+import gzip
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from assets import versions
+from .models import TransactionLog
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+CHUNK_SIZE = 5000
+SCOPING_KEYS = ('base_id', 'from_base_id', 'to_base_id')
+
+
+def archive_dir():
+    return Path(getattr(settings, 'TRANSACTION_LOG_ARCHIVE_DIR', settings.BASE_DIR / 'log_archive'))
+
+
+def retention_cutoff(retention_days=None, now=None):
+    """Start of the month that contains ``now - retention_days``; older months are archived."""
+    if retention_days is None:
+        retention_days = getattr(settings, 'TRANSACTION_LOG_RETENTION_DAYS', 180)
+    edge = timezone.localtime(now) - timedelta(days=retention_days)
+    return edge.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _paths(month):
+    directory = archive_dir()
+    return directory / f'{month}.ndjson.gz', directory / f'{month}.idx.json'
+
+
+def read_index(month):
+    _, index_path = _paths(month)
+    try:
+        return json.loads(index_path.read_text())
+    except FileNotFoundError:
+        return {
+            'month': month, 'count': 0, 'min_id': None, 'max_id': 0,
+            'min_timestamp': None, 'max_timestamp': None, 'bases': [], 'size': 0,
+        }
+
+
+def _write_index(index):
+    _, index_path = _paths(index['month'])
+    tmp_path = index_path.with_suffix('.tmp')
+    tmp_path.write_text(json.dumps(index, sort_keys=True))
+    os.replace(tmp_path, index_path)
+
+
+def _row(log):
+    return {
+        'id': log.id,
+        'user': str(log.user) if log.user_id else None,
+        'user_id': log.user_id,
+        'action_type': log.action_type,
+        'model_name': log.model_name,
+        'object_id': log.object_id,
+        'timestamp': log.timestamp,
+        'details': log.details,
+        'base_id': log.base_id,
+        'from_base_id': log.from_base_id,
+        'to_base_id': log.to_base_id,
+        'equipment_type_id': log.equipment_type_id,
+    }
+
+
+def _append(month, logs):
+    index = read_index(month)
+    logs = [log for log in logs if log.id > index['max_id']]
+    if not logs:
+        return 0
+
+    segment_path, _ = _paths(month)
+    encoder = DjangoJSONEncoder()
+    payload = ''.join(encoder.encode(_row(log)) + '\n' for log in logs).encode()
+    with open(segment_path, 'ab') as segment:
+        # Sidecars written before 'size' was recorded trust the whole file.
+        size = index.get('size', segment.tell())
+        if segment.tell() > size:
+            # An earlier run appended but stopped before its sidecar.
+            segment.truncate(size)
+        segment.write(gzip.compress(payload))
+        segment.flush()
+        os.fsync(segment.fileno())
+        size = segment.tell()
+
+    timestamps = [log.timestamp.isoformat() for log in logs]
+    bases = set(index['bases'])
+    for log in logs:
+        bases.update(getattr(log, key) for key in SCOPING_KEYS if getattr(log, key))
+    index.update(
+        count=index['count'] + len(logs),
+        min_id=index['min_id'] or logs[0].id,
+        max_id=logs[-1].id,
+        min_timestamp=min([index['min_timestamp'] or timestamps[0], *timestamps]),
+        max_timestamp=max([index['max_timestamp'] or timestamps[0], *timestamps]),
+        bases=sorted(bases),
+        size=size,
+    )
+    _write_index(index)
+    return len(logs)
+
+
+@contextmanager
+def _archive_lock(wait=True):
+    """Hold the directory's archive lock; yields False if ``wait`` is off and it is taken."""
+    directory = archive_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / '.archive.lock', 'w') as lock:
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX if wait else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+        yield True
+
+
+def archive_logs(retention_days=None, chunk_size=CHUNK_SIZE, dry_run=False, wait=True):
+    """
+    Move logs from months before the retention cutoff into segments. Returns
+    rows moved: 0 without ``wait`` when another run holds the archive lock.
+    """
+    cutoff = retention_cutoff(retention_days)
+    old = TransactionLog.objects.filter(timestamp__lt=cutoff).select_related('user')
+    if dry_run:
+        return old.count()
+
+    with _archive_lock(wait) as locked:
+        if not locked:
+            return 0
+        return _move(old, cutoff, chunk_size)
+
+
+def _move(old, cutoff, chunk_size):
+    moved = 0
+    while True:
+        chunk = list(old.order_by('id')[:chunk_size])
+        if not chunk:
+            return moved
+
+        months = {}
+        for log in chunk:
+            months.setdefault(timezone.localtime(log.timestamp).strftime('%Y-%m'), []).append(log)
+        for month, logs in sorted(months.items()):
+            _append(month, logs)
+
+        # The chunk is exactly the old rows in this id range.
+        TransactionLog.objects.filter(
+            id__gte=chunk[0].id, id__lte=chunk[-1].id, timestamp__lt=cutoff
+        ).delete()
+        versions.bump(*{getattr(log, key) for log in chunk for key in SCOPING_KEYS})
+        moved += len(chunk)
+
+
+def _months_between(start_date, end_date):
+    months = []
+    for path in sorted(archive_dir().glob('*.idx.json')):
+        month = path.name[:7]
+        first = datetime.strptime(month, '%Y-%m').date()
+        if start_date and first < start_date.replace(day=1):
+            continue
+        if end_date and first > end_date:
+            continue
+        months.append(month)
+    return months
+
+
+def read_archived(start_date=None, end_date=None, bases=(), action_type=None, before=None):
+    """
+    Yield archived rows (dicts shaped like TransactionLog) matching the
+    filters, newest (timestamp, id) first.
+
+    Every id in ``bases`` must be involved in a row, and with ``before``, a
+    (timestamp, id) cursor, only older rows are yielded. Segments are chosen
+    from their sidecar alone: only months that overlap the date range,
+    involve those bases and start before the cursor are decompressed, one at
+    a time, so a reader that stops after a page leaves older months unread.
+    """
+    bases = {int(base_id) for base_id in bases}
+    for month in reversed(_months_between(start_date, end_date)):
+        index = read_index(month)
+        if not bases.issubset(index['bases']):
+            continue
+        if before and index['min_timestamp'] and parse_datetime(index['min_timestamp']) > before[0]:
+            continue
+        rows = []
+        segment_path, _ = _paths(month)
+        with gzip.open(segment_path, 'rt') as segment:
+            for line in segment:
+                row = json.loads(line)
+                row['timestamp'] = parse_datetime(row['timestamp'])
+                day = timezone.localtime(row['timestamp']).date()
+                if start_date and day < start_date:
+                    continue
+                if end_date and day > end_date:
+                    continue
+                if action_type and row['action_type'] != action_type:
+                    continue
+                if not bases.issubset(row[key] for key in SCOPING_KEYS):
+                    continue
+                if before and (row['timestamp'], row['id']) >= before:
+                    continue
+                rows.append(row)
+        # Segments are in id order; months never overlap in time.
+        rows.sort(key=lambda row: (row['timestamp'], row['id']), reverse=True)
+        yield from rows
+
+
+def run_scheduled_archive():
+    """Archive once, unless another run holds the archive lock."""
+    return archive_logs(wait=False)
+
+
+def start_scheduler(interval_hours):
+    """Run ``run_scheduled_archive`` every ``interval_hours`` on a daemon thread."""
+    def loop():
+        run_scheduled_archive()
+        timer = threading.Timer(interval_hours * 3600, loop)
+        timer.daemon = True
+        timer.start()
+
+    timer = threading.Timer(interval_hours * 3600, loop)
+    timer.daemon = True
+    timer.start()
+    return timer
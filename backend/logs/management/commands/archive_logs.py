@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from logs.archive import archive_dir, archive_logs, retention_cutoff
+
+
+class Command(BaseCommand):
+    help = "Move TransactionLog months older than the retention window into compressed archive segments."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--retention-days", type=int, help="Override TRANSACTION_LOG_RETENTION_DAYS.")
+        parser.add_argument("--chunk-size", type=int, default=5000)
+        parser.add_argument("--dry-run", action="store_true", help="Only count the rows that would move.")
+
+    def handle(self, *args, **options):
+        cutoff = retention_cutoff(options["retention_days"])
+        moved = archive_logs(
+            retention_days=options["retention_days"],
+            chunk_size=options["chunk_size"],
+            dry_run=options["dry_run"],
+        )
+        verb = "Would archive" if options["dry_run"] else "Archived"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {moved} log entries from before {cutoff:%Y-%m-%d} into {archive_dir()}."
+        ))
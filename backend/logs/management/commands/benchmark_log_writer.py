@@ -0,0 +1,88 @@
+import statistics
+import time
+from datetime import datetime, timezone
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from assets.models import Base, EquipmentType, Purchase
+from logs.writer import deferred
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure write-path latency and database round trips with TransactionLog "
+        "entries written immediately versus deferred and batched, in a scratch database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Single-create API requests.')
+        parser.add_argument('--rows', type=int, default=2000, help='Creates inside one transaction.')
+
+    def handle(self, *args, **options):
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def run(self, options):
+        self.base = Base.objects.create(name='Alpha', code='A')
+        self.rifle = EquipmentType.objects.create(name='Rifle', category='Weapon')
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.client.force_authenticate(User.objects.create_user('bench', role=User.ROLE_ADMIN))
+
+        for deferred in (False, True):
+            label = 'deferred' if deferred else 'immediate'
+            with override_settings(TRANSACTION_LOG_DEFERRED=deferred):
+                latency, queries = self.single_creates(options['requests'])
+                self.stdout.write(
+                    f"{label:>9} single create: p50 {statistics.median(latency):.2f} ms, "
+                    f"p95 {statistics.quantiles(latency, n=20)[-1]:.2f} ms, "
+                    f"{queries:.1f} queries/request"
+                )
+                elapsed, queries = self.transactional_creates(options['rows'])
+                self.stdout.write(
+                    f"{label:>9} {options['rows']} creates in one transaction: "
+                    f"{elapsed:.0f} ms, {queries} queries"
+                )
+
+    def payload(self):
+        return {
+            'base': self.base.id, 'equipment_type': self.rifle.id, 'quantity': 1,
+            'purchased_at': datetime(2025, 1, 1, tzinfo=timezone.utc).isoformat(),
+        }
+
+    def single_creates(self, count):
+        latency = []
+        queries = QueryCounter()
+        with connection.execute_wrapper(queries):
+            for _ in range(count):
+                started = time.perf_counter()
+                response = self.client.post('/api/purchases/', self.payload(), format='json')
+                latency.append((time.perf_counter() - started) * 1000)
+                assert response.status_code == 201, response.content
+        return latency, queries.count / count
+
+    def transactional_creates(self, count):
+        queries = QueryCounter()
+        started = time.perf_counter()
+        with connection.execute_wrapper(queries), transaction.atomic(), deferred():
+            for _ in range(count):
+                Purchase.objects.create(
+                    base=self.base, equipment_type=self.rifle, quantity=1,
+                    purchased_at=datetime(2025, 1, 1, tzinfo=timezone.utc),
+                )
+        return (time.perf_counter() - started) * 1000, queries.count
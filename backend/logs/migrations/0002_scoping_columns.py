@@ -0,0 +1,71 @@
+# Generated by Django 5.0.6 on 2026-10-18 13:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("assets", "0003_movement_access_indexes"),
+        ("logs", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="transactionlog",
+            name="base",
+            field=models.ForeignKey(
+                blank=True,
+                db_constraint=False,
+                null=True,
+                on_delete=django.db.models.deletion.DO_NOTHING,
+                related_name="+",
+                to="assets.base",
+            ),
+        ),
+        migrations.AddField(
+            model_name="transactionlog",
+            name="equipment_type",
+            field=models.ForeignKey(
+                blank=True,
+                db_constraint=False,
+                null=True,
+                on_delete=django.db.models.deletion.DO_NOTHING,
+                related_name="+",
+                to="assets.equipmenttype",
+            ),
+        ),
+        migrations.AddField(
+            model_name="transactionlog",
+            name="from_base",
+            field=models.ForeignKey(
+                blank=True,
+                db_constraint=False,
+                null=True,
+                on_delete=django.db.models.deletion.DO_NOTHING,
+                related_name="+",
+                to="assets.base",
+            ),
+        ),
+        migrations.AddField(
+            model_name="transactionlog",
+            name="to_base",
+            field=models.ForeignKey(
+                blank=True,
+                db_constraint=False,
+                null=True,
+                on_delete=django.db.models.deletion.DO_NOTHING,
+                related_name="+",
+                to="assets.base",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transactionlog",
+            index=models.Index(
+                fields=["timestamp", "id"], name="transactionlog_time_id_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,39 @@
+from django.db import migrations
+
+CHUNK_SIZE = 5000
+SCOPING_KEYS = ("base", "from_base", "to_base", "equipment_type")
+
+
+def backfill_scoping_columns(apps, schema_editor):
+    TransactionLog = apps.get_model("logs", "TransactionLog")
+    last_id = 0
+    while True:
+        chunk = list(
+            TransactionLog.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .only("id", "details")[:CHUNK_SIZE]
+        )
+        if not chunk:
+            break
+        for log in chunk:
+            details = log.details or {}
+            for key in SCOPING_KEYS:
+                setattr(log, f"{key}_id", details.get(key))
+        TransactionLog.objects.bulk_update(
+            chunk, [f"{key}_id" for key in SCOPING_KEYS], batch_size=500
+        )
+        last_id = chunk[-1].id
+
+
+class Migration(migrations.Migration):
+
+    # Each chunk commits on its own so large tables are not locked at once.
+    atomic = False
+
+    dependencies = [
+        ("logs", "0002_scoping_columns"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_scoping_columns, migrations.RunPython.noop),
+    ]
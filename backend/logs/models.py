@@ -18,5 +18,29 @@ class TransactionLog(models.Model):
     timestamp = models.DateTimeField(auto_now_add=True)
     details = models.JSONField(blank=True, null=True)
 
+    # Copies of the scoping keys in ``details``, as indexed columns. No FK
+    # constraint, so audit rows keep their ids if a base is deleted.
+    base = models.ForeignKey(
+        'assets.Base', null=True, blank=True, on_delete=models.DO_NOTHING,
+        db_constraint=False, related_name='+',
+    )
+    from_base = models.ForeignKey(
+        'assets.Base', null=True, blank=True, on_delete=models.DO_NOTHING,
+        db_constraint=False, related_name='+',
+    )
+    to_base = models.ForeignKey(
+        'assets.Base', null=True, blank=True, on_delete=models.DO_NOTHING,
+        db_constraint=False, related_name='+',
+    )
+    equipment_type = models.ForeignKey(
+        'assets.EquipmentType', null=True, blank=True, on_delete=models.DO_NOTHING,
+        db_constraint=False, related_name='+',
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['timestamp', 'id'], name='transactionlog_time_id_idx'),
+        ]
+
     def __str__(self):
         return f"{self.action_type} by {self.user} on {self.timestamp}"
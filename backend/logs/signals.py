@@ -2,23 +2,10 @@ from django.db.models.signals import post_save
 from django.dispatch import receiver
 
 from assets.models import Purchase, Transfer, Assignment, Expenditure
-from .models import TransactionLog
+from .writer import build_entry, enqueue
 
 def _create_log(instance, action_type):
-    user = getattr(instance, 'created_by', None)
-    TransactionLog.objects.create(
-        user=user,
-        action_type=action_type,
-        model_name=instance.__class__.__name__,
-        object_id=instance.id,
-        details={
-            'base': getattr(instance, 'base_id', None),
-            'from_base': getattr(instance, 'from_base_id', None),
-            'to_base': getattr(instance, 'to_base_id', None),
-            'equipment_type': getattr(instance, 'equipment_type_id', None),
-            'quantity': getattr(instance, 'quantity', None),
-        }
-    )
+    enqueue(build_entry(instance, action_type))
 
 @receiver(post_save, sender=Purchase)
 def log_purchase(sender, instance, created, **kwargs):
@@ -1,3 +1,281 @@
-from django.test import TestCase
+import gzip
+import json
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from unittest import mock
+from urllib.parse import parse_qsl, urlsplit
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.db import DatabaseError, connection, transaction
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone as django_timezone
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from accounts.serializers import ClaimsTokenObtainPairSerializer
+from assets.models import Base, EquipmentType, Purchase
+from .archive import _archive_lock, archive_logs, read_archived, read_index, run_scheduled_archive
+from .models import TransactionLog
+from .writer import build_entry, deferred
+
+
+class DeferredLogWriterTests(TransactionTestCase):
+
+    def setUp(self):
+        self.base = Base.objects.create(name='Alpha', code='A')
+        self.rifle = EquipmentType.objects.create(name='Rifle', category='Weapon')
+
+    def purchase(self):
+        return Purchase.objects.create(
+            base=self.base, equipment_type=self.rifle, quantity=1,
+            purchased_at=datetime(2025, 1, 1, tzinfo=timezone.utc),
+        )
+
+    def log_inserts(self, queries):
+        return [q for q in queries if q['sql'].startswith('INSERT INTO "logs_transactionlog"')]
+
+    def test_entries_are_written_in_one_insert_before_commit(self):
+        with CaptureQueriesContext(connection) as queries:
+            with transaction.atomic():
+                with deferred():
+                    created = [self.purchase() for _ in range(3)]
+                    self.assertFalse(TransactionLog.objects.exists())
+                self.assertEqual(TransactionLog.objects.count(), 3)
+
+        self.assertEqual(len(self.log_inserts(queries)), 1)
+        self.assertEqual(
+            sorted(TransactionLog.objects.values_list('object_id', flat=True)),
+            sorted(p.id for p in created),
+        )
+
+    def test_rolled_back_transaction_writes_nothing(self):
+        with self.assertRaises(RuntimeError), transaction.atomic(), deferred():
+            self.purchase()
+            raise RuntimeError
+
+        with transaction.atomic(), deferred():
+            kept = self.purchase()
+
+        self.assertEqual(list(TransactionLog.objects.values_list('object_id', flat=True)), [kept.id])
+
+    def test_rolled_back_savepoint_drops_only_its_entries(self):
+        with transaction.atomic(), deferred():
+            kept = self.purchase()
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                self.purchase()
+                raise RuntimeError
+            also_kept = self.purchase()
+
+        self.assertEqual(
+            sorted(TransactionLog.objects.values_list('object_id', flat=True)),
+            [kept.id, also_kept.id],
+        )
+
+    def test_a_failed_log_write_rolls_back_the_movements(self):
+        with mock.patch.object(TransactionLog.objects, 'bulk_create', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError), transaction.atomic(), deferred():
+                self.purchase()
+                self.purchase()
+
+        self.assertFalse(Purchase.objects.exists())
+
+    def test_entries_outside_a_block_are_written_with_their_movement(self):
+        with transaction.atomic():
+            created = self.purchase()
+            self.assertTrue(TransactionLog.objects.filter(object_id=created.id).exists())
+
+    @override_settings(TRANSACTION_LOG_BATCH_SIZE=2)
+    def test_batches_flush_at_size_threshold(self):
+        with CaptureQueriesContext(connection) as queries:
+            with transaction.atomic(), deferred():
+                for _ in range(5):
+                    self.purchase()
+
+        self.assertEqual(len(self.log_inserts(queries)), 3)
+        self.assertEqual(TransactionLog.objects.count(), 5)
+
+
+class LogArchiveTests(TestCase):
+
+    def setUp(self):
+        archive_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(archive_dir.cleanup)
+        settings_override = override_settings(TRANSACTION_LOG_ARCHIVE_DIR=archive_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.alpha = Base.objects.create(name='Alpha', code='A')
+        self.bravo = Base.objects.create(name='Bravo', code='B')
+        self.rifle = EquipmentType.objects.create(name='Rifle', category='Weapon')
+        self.admin = User.objects.create_user(username='admin', password='x', role=User.ROLE_ADMIN)
+        self.commander = User.objects.create_user(
+            username='cmd', password='x', role=User.ROLE_COMMANDER, base=self.bravo,
+        )
+
+        now = django_timezone.now()
+        self.old = [self.log(self.alpha, now - timedelta(days=400 + i)) for i in range(3)]
+        self.old.append(self.log(self.bravo, now - timedelta(days=500)))
+        self.recent = self.log(self.alpha, now)
+
+    def log(self, base, timestamp):
+        purchase = Purchase(id=TransactionLog.objects.count() + 1, base=base,
+                            equipment_type=self.rifle, quantity=1)
+        entry = build_entry(purchase)
+        entry.save()
+        TransactionLog.objects.filter(pk=entry.pk).update(timestamp=timestamp)
+        entry.refresh_from_db()
+        return entry
+
+    def archived_ids(self, **filters):
+        return sorted(row['id'] for row in read_archived(**filters))
+
+    def test_old_months_move_out_of_the_table(self):
+        self.assertEqual(archive_logs(retention_days=180), 4)
+
+        self.assertEqual(list(TransactionLog.objects.values_list('id', flat=True)), [self.recent.id])
+        self.assertEqual(self.archived_ids(), sorted(log.id for log in self.old))
+        self.assertEqual(self.archived_ids(bases=[self.bravo.id]), [self.old[-1].id])
+
+    def test_rerun_after_an_interrupted_delete_writes_nothing_twice(self):
+        month = django_timezone.localtime(self.old[-1].timestamp).strftime('%Y-%m')
+        archive_logs(retention_days=180)
+        # Put the rows back as if the delete had never happened.
+        for log in self.old:
+            timestamp = log.timestamp
+            TransactionLog.objects.bulk_create([log])
+            TransactionLog.objects.filter(pk=log.pk).update(timestamp=timestamp)
+
+        self.assertEqual(archive_logs(retention_days=180), 4)
+        self.assertEqual(self.archived_ids(), sorted(log.id for log in self.old))
+        self.assertEqual(read_index(month)['count'], 1)
+
+    def test_rerun_after_a_crash_before_the_sidecar_writes_nothing_twice(self):
+        month = django_timezone.localtime(self.old[-1].timestamp).strftime('%Y-%m')
+        with mock.patch('logs.archive._write_index', side_effect=SystemExit), self.assertRaises(SystemExit):
+            archive_logs(retention_days=180)
+        # The segment got its rows; the sidecar and the table never heard of it.
+        self.assertEqual(TransactionLog.objects.count(), 5)
+        self.assertEqual(read_index(month)['count'], 0)
+
+        self.assertEqual(archive_logs(retention_days=180), 4)
+        self.assertEqual(self.archived_ids(), sorted(log.id for log in self.old))
+        self.assertEqual(read_index(month)['count'], 1)
+
+    def test_runs_take_turns_on_the_archive_lock(self):
+        with _archive_lock():
+            self.assertEqual(run_scheduled_archive(), 0)
+            self.assertEqual(TransactionLog.objects.count(), 5)
+        self.assertEqual(run_scheduled_archive(), 4)
+
+    def test_archived_ranges_are_served_with_the_same_scoping(self):
+        archive_logs(retention_days=180)
+        client = APIClient()
+
+        client.force_authenticate(self.admin)
+        response = client.get('/api/logs/', {'source': 'archive', 'page_size': 3})
+        first = [row['id'] for row in response.data['results']]
+        self.assertEqual(first, [log.id for log in self.old[:3]])
+        response = client.get(response.data['next'])
+        self.assertEqual([row['id'] for row in response.data['results']], [self.old[3].id])
+        self.assertIsNone(response.data['next'])
+
+        client.force_authenticate(self.commander)
+        response = client.get('/api/logs/', {'source': 'archive'})
+        self.assertEqual([row['id'] for row in response.data['results']], [self.old[-1].id])
+
+    def test_malformed_base_ids_are_rejected(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        for params in ({'source': 'archive', 'base_id': 'abc'}, {'base_id': 'abc'}):
+            with self.subTest(params=params):
+                response = client.get('/api/logs/', params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('base_id', response.json())
+
+        token = ClaimsTokenObtainPairSerializer.get_token(self.admin).access_token
+        response = async_to_sync(AsyncClient().get)(
+            '/api/async/logs/', {'source': 'archive', 'base_id': 'abc'},
+            headers={'authorization': f'Bearer {token}'},
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_archive_pages_read_only_the_months_they_need(self):
+        TransactionLog.objects.all().delete()
+        logs = [
+            self.log(self.alpha, datetime(2024, month, day, 12, tzinfo=timezone.utc))
+            for month, day in ((1, 15), (2, 15), (3, 15), (3, 16))
+        ]
+        archive_logs(retention_days=180)
+        client = APIClient()
+        client.force_authenticate(self.admin)
+
+        def page(params):
+            opened = []
+            real_open = gzip.open
+
+            def gzip_open(path, *args, **kwargs):
+                opened.append(Path(path).name[:7])
+                return real_open(path, *args, **kwargs)
+
+            with mock.patch('logs.archive.gzip.open', gzip_open):
+                data = client.get('/api/logs/', params).data
+            return [row['id'] for row in data['results']], data['next'], opened
+
+        # March alone fills a page of one, with a row to spare.
+        ids, _, opened = page({'source': 'archive', 'page_size': 1})
+        self.assertEqual((ids, opened), ([logs[3].id], ['2024-03']))
+
+        ids, next_link, opened = page({'source': 'archive', 'page_size': 3})
+        self.assertEqual(ids, [logs[3].id, logs[2].id, logs[1].id])
+        self.assertEqual(opened, ['2024-03', '2024-02', '2024-01'])
+        # The cursor is in February: March is skipped unread.
+        query = dict(parse_qsl(urlsplit(next_link).query))
+        ids, next_link, opened = page(query)
+        self.assertEqual((ids, next_link, opened), ([logs[0].id], None, ['2024-02', '2024-01']))
+
+
+@override_settings(SQL_INSTRUMENTATION=True, SLOW_REQUEST_MS=0)
+class SQLInstrumentationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.base = Base.objects.create(name='Alpha', code='A')
+        cls.rifle = EquipmentType.objects.create(name='Rifle', category='Weapon')
+        cls.admin = User.objects.create_user(username='admin', password='x', role=User.ROLE_ADMIN)
+        users = [
+            User.objects.create_user(username=f'logi{i}', password='x', role=User.ROLE_LOGISTICS, base=cls.base)
+            for i in range(4)
+        ]
+        for i, user in enumerate(users):
+            purchase = Purchase(id=i + 1, base=cls.base, equipment_type=cls.rifle, quantity=1, created_by=user)
+            build_entry(purchase).save()
+
+    def test_timings_header_and_slow_request_record(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        with self.assertLogs('config.instrumentation', 'WARNING') as logged:
+            response = client.get('/api/logs/')
+
+        self.assertEqual(len(response.data['results']), 4)
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ queries", app;dur=')
+        record = json.loads(logged.records[0].getMessage())
+        self.assertEqual(record['view'], 'transactionlog-list')
+        self.assertTrue(record['explain'])
+        # The users come with the page, not one query per entry.
+        self.assertEqual(record['most_repeated']['times'], 1)
+        self.assertLessEqual(record['queries'], 3)
+
+    def test_async_views_are_timed_and_explained(self):
+        token = ClaimsTokenObtainPairSerializer.get_token(self.admin).access_token
+        with self.assertLogs('config.instrumentation', 'WARNING') as logged:
+            response = async_to_sync(AsyncClient().get)(
+                '/api/async/logs/', headers={'authorization': f'Bearer {token}'}
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="[1-9]\d* queries"')
+        record = json.loads(logged.records[0].getMessage())
+        self.assertEqual(record['view'], 'transactionlog-async')
+        self.assertTrue(record['explain'])
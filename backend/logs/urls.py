@@ -1,10 +1,11 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import TransactionLogViewSet
+from .views import AsyncTransactionLogListView, TransactionLogViewSet
 
 router = DefaultRouter()
 router.register(r'logs', TransactionLogViewSet, basename='transactionlog')
 
 urlpatterns = [
+    path('async/logs/', AsyncTransactionLogListView.as_view(), name='transactionlog-async'),
     path('', include(router.urls)),
 ]
@@ -1,56 +1,115 @@
-from datetime import datetime
+from functools import partial
+
+from asgiref.sync import sync_to_async
 from django.db.models import Q
-from django.utils.dateparse import parse_date
 from rest_framework import viewsets
-from rest_framework.permissions import IsAuthenticated
 from accounts.models import User
+from assets.exports import ExportMixin
+from assets.filters import date_range_q, parse_date_range, parse_id
+from config.async_views import AsyncAPIView, json_response
+from config.conditional import ConditionalGetMixin
+from config.database import ReplicaReadMixin
+from config.pagination import KeysetPagination
+from .archive import read_archived
 from .models import TransactionLog
 from .serializers import TransactionLogSerializer
 
 
-class TransactionLogViewSet(viewsets.ReadOnlyModelViewSet):
+def _involving(base_id):
+    return Q(base_id=base_id) | Q(from_base_id=base_id) | Q(to_base_id=base_id)
+
+
+class TransactionLogViewSet(ReplicaReadMixin, ConditionalGetMixin, ExportMixin, viewsets.ReadOnlyModelViewSet):
    
-    queryset = TransactionLog.objects.all().order_by('-timestamp')
+    # The serializer prints each entry's user.
+    queryset = TransactionLog.objects.select_related('user').order_by('-timestamp', '-id')
     serializer_class = TransactionLogSerializer
-    permission_classes = [IsAuthenticated]
+    keyset_field = 'timestamp'
+    export_fields = ('id', 'timestamp', 'user__username', 'action_type',
+                     'model_name', 'object_id', 'details')
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get('source') != 'archive':
+            return super().list(request, *args, **kwargs)
+
+        # Months moved out of the table by `archive_logs`, read on demand.
+        page = self.paginate_queryset(self.get_archived_rows())
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+    def get_archived_rows(self):
+        return archived_logs(self.request.user, self.request.query_params)
 
     def get_queryset(self):
-        user = self.request.user
-        qs = super().get_queryset()
+        return visible_logs(super().get_queryset(), self.request.user, self.request.query_params)
 
-        if user.is_superuser or user.role == User.ROLE_ADMIN:
-            pass
-        else:
-            if not user.base:
-                return TransactionLog.objects.none()
-
-            base_id = user.base.id
-            qs = qs.filter(
-                Q(details__base=base_id) |
-                Q(details__from_base=base_id) |
-                Q(details__to_base=base_id)
-            )
 
-        action_type = self.request.query_params.get('action_type')
-        if action_type:
-            qs = qs.filter(action_type=action_type)
-
-        start_date_str = self.request.query_params.get('start_date')
-        end_date_str = self.request.query_params.get('end_date')
-        start_date = parse_date(start_date_str) if start_date_str else None
-        end_date = parse_date(end_date_str) if end_date_str else None
-
-        if start_date:
-            qs = qs.filter(timestamp__date__gte=start_date)
-        if end_date:
-            qs = qs.filter(timestamp__date__lte=end_date)
-
-        base_id_param = self.request.query_params.get('base_id')
-        if base_id_param:
-            qs = qs.filter(
-                Q(details__base=int(base_id_param)) |
-                Q(details__from_base=int(base_id_param)) |
-                Q(details__to_base=int(base_id_param))
-            )
+def archived_logs(user, params):
+    """The archived rows ``user`` may see, narrowed by the list filters."""
+    bases = []
+    if not (user.is_superuser or user.role == User.ROLE_ADMIN):
+        if not user.base_id:
+            return []
+        bases.append(user.base_id)
+
+    base_id_param = parse_id(params, 'base_id')
+    if base_id_param:
+        bases.append(base_id_param)
+
+    start_date, end_date = parse_date_range(params)
+    # Called by the paginator with its cursor, so it can skip newer months.
+    return partial(
+        read_archived, start_date, end_date, bases=bases,
+        action_type=params.get('action_type'),
+    )
+
+
+def visible_logs(qs, user, params):
+    """``qs`` limited to the logs ``user`` may see and narrowed by the list filters."""
+    if user.is_superuser or user.role == User.ROLE_ADMIN:
+        pass
+    else:
+        if not user.base_id:
+            return TransactionLog.objects.none()
 
-        return qs
+        qs = qs.filter(_involving(user.base_id))
+
+    action_type = params.get('action_type')
+    if action_type:
+        qs = qs.filter(action_type=action_type)
+
+    start_date, end_date = parse_date_range(params)
+    if start_date or end_date:
+        qs = qs.filter(date_range_q('timestamp', start_date, end_date))
+
+    base_id_param = parse_id(params, 'base_id')
+    if base_id_param:
+        qs = qs.filter(_involving(base_id_param))
+
+    return qs
+
+
+class AsyncTransactionLogListView(ConditionalGetMixin, AsyncAPIView):
+    """
+    The ``TransactionLogViewSet`` list for ASGI servers: same filters, pages
+    and validators, with the page fetched by async iteration.
+    """
+
+    keyset_field = TransactionLogViewSet.keyset_field
+
+    async def get(self, request, format=None):
+        return await self.aconditional_response(request, lambda: self.page(request))
+
+    async def page(self, request):
+        paginator = KeysetPagination()
+        if request.query_params.get('source') == 'archive':
+            # Reading the segment files blocks, so it runs on a thread.
+            page = await sync_to_async(paginator.paginate_queryset)(
+                archived_logs(request.user, request.query_params), request, self
+            )
+        else:
+            logs = visible_logs(
+                TransactionLog.objects.select_related('user'), request.user, request.query_params
+            )
+            page = await paginator.apaginate_queryset(logs, request, self)
+        data = TransactionLogSerializer(page, many=True).data
+        return json_response(paginator.get_paginated_data(data))
@@ -0,0 +1,141 @@
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+from assets import versions
+from .models import TransactionLog
+
+ACTION_TYPES = {
+    'Purchase': 'PURCHASE',
+    'Transfer': 'TRANSFER',
+    'Assignment': 'ASSIGNMENT',
+    'Expenditure': 'EXPENDITURE',
+}
+
+def build_entry(instance, action_type=None):
+    """An unsaved TransactionLog row describing a newly created movement."""
+    model_name = instance.__class__.__name__
+    return TransactionLog(
+        user_id=getattr(instance, 'created_by_id', None),
+        action_type=action_type or ACTION_TYPES[model_name],
+        model_name=model_name,
+        object_id=instance.id,
+        base_id=getattr(instance, 'base_id', None),
+        from_base_id=getattr(instance, 'from_base_id', None),
+        to_base_id=getattr(instance, 'to_base_id', None),
+        equipment_type_id=getattr(instance, 'equipment_type_id', None),
+        details={
+            'base': getattr(instance, 'base_id', None),
+            'from_base': getattr(instance, 'from_base_id', None),
+            'to_base': getattr(instance, 'to_base_id', None),
+            'equipment_type': getattr(instance, 'equipment_type_id', None),
+            'quantity': getattr(instance, 'quantity', None),
+        }
+    )
+
+
+def write_entries(entries, batch_size=None):
+    if len(entries) == 1:
+        # A plain INSERT; bulk_create would add a transaction around it.
+        entries[0].save()
+    else:
+        TransactionLog.objects.bulk_create(entries, batch_size=batch_size or _batch_size())
+    # The log list is versioned by the bases its entries touch.
+    versions.bump_on_commit(*{
+        base_id for entry in entries
+        for base_id in (entry.base_id, entry.from_base_id, entry.to_base_id)
+    })
+    return entries
+
+
+def _batch_size():
+    return getattr(settings, 'TRANSACTION_LOG_BATCH_SIZE', 500)
+
+
+def _max_delay():
+    return getattr(settings, 'TRANSACTION_LOG_MAX_DELAY', 2.0)
+
+
+class _Batch:
+    """Entries waiting to be written together before their transaction commits."""
+
+    def __init__(self):
+        self.entries = []
+        self.started = time.monotonic()
+
+    def add(self, entries):
+        if not self.entries:
+            self.started = time.monotonic()
+        self.entries.extend(entries)
+        if len(self.entries) >= _batch_size() or time.monotonic() - self.started >= _max_delay():
+            self.flush()
+
+    def flush(self):
+        entries, self.entries = self.entries, []
+        if entries:
+            write_entries(entries)
+
+
+def _savepoint_level(connection):
+    # atomic(savepoint=False) blocks record None: their errors roll back the
+    # enclosing block, so entries inside them belong to its level.
+    return tuple(sid for sid in connection.savepoint_ids if sid)
+
+
+def _batches(connection):
+    return connection.__dict__.setdefault('_transaction_log_batches', {})
+
+
+def enqueue(*entries, using=DEFAULT_DB_ALIAS):
+    """
+    Record TransactionLog entries.
+
+    Inside a ``deferred()`` block, and at its savepoint level, they are
+    collected and written by the block. Anywhere else they are written
+    straight away, inside whatever transaction is open, so a rollback
+    always takes them with it.
+    """
+    connection = connections[using]
+    batch = None
+    if getattr(settings, 'TRANSACTION_LOG_DEFERRED', True) and connection.in_atomic_block:
+        batch = _batches(connection).get(_savepoint_level(connection))
+    if batch is None:
+        write_entries(list(entries))
+    else:
+        batch.add(entries)
+
+
+@contextmanager
+def deferred(using=DEFAULT_DB_ALIAS):
+    """
+    Write the log entries enqueued in this block in one insert as it exits.
+
+    Use it inside the transaction that creates the movements, so the entries
+    are written before it commits and roll back with it. They are written
+    on an exception too, unless the transaction can no longer commit, in
+    case the caller handles it and commits the movements anyway. Outside a
+    transaction it does nothing.
+    """
+    connection = connections[using]
+    batches = _batches(connection)
+    level = _savepoint_level(connection)
+    if not connection.in_atomic_block or level in batches:
+        yield
+        return
+    batch = batches[level] = _Batch()
+    try:
+        yield
+    except BaseException:
+        if not connection.needs_rollback:
+            try:
+                batch.flush()
+            except DatabaseError:
+                # The transaction is broken and will not commit.
+                pass
+        raise
+    else:
+        batch.flush()
+    finally:
+        del batches[level]
@@ -34,6 +34,7 @@ export default function LogsPage() {
     end_date: '',
   });
   const [items, setItems] = useState([]);
+  const [nextPage, setNextPage] = useState(null);
 
   useEffect(() => {
     async function loadBases() {
@@ -59,7 +60,14 @@ export default function LogsPage() {
         end_date: filters.end_date || undefined,
       },
     });
-    setItems(res.data);
+    setItems(res.data.results);
+    setNextPage(res.data.next);
+  };
+
+  const loadMore = async () => {
+    const res = await api.get(nextPage);
+    setItems((prev) => [...prev, ...res.data.results]);
+    setNextPage(res.data.next);
   };
 
   return (
@@ -176,6 +184,11 @@ export default function LogsPage() {
             ))}
           </TableBody>
         </Table>
+        {nextPage && (
+          <Button sx={{ mt: 2 }} onClick={loadMore}>
+            Load more
+          </Button>
+        )}
       </Paper>
     </Box>
   );
@@ -27,6 +27,7 @@ export default function PurchasesPage() {
     end_date: '',
   });
   const [items, setItems] = useState([]);
+  const [nextPage, setNextPage] = useState(null);
   const [form, setForm] = useState({
     base: '',
     equipment_type: '',
@@ -68,7 +69,14 @@ export default function PurchasesPage() {
         end_date: filters.end_date || undefined,
       },
     });
-    setItems(res.data);
+    setItems(res.data.results);
+    setNextPage(res.data.next);
+  };
+
+  const loadMore = async () => {
+    const res = await api.get(nextPage);
+    setItems((prev) => [...prev, ...res.data.results]);
+    setNextPage(res.data.next);
   };
 
   const handleCreate = async (e) => {
@@ -280,6 +288,11 @@ export default function PurchasesPage() {
             ))}
           </TableBody>
         </Table>
+        {nextPage && (
+          <Button sx={{ mt: 2 }} onClick={loadMore}>
+            Load more
+          </Button>
+        )}
       </Paper>
     </Box>
   );
@@ -26,6 +26,7 @@ export default function TransfersPage() {
     end_date: '',
   });
   const [items, setItems] = useState([]);
+  const [nextPage, setNextPage] = useState(null);
   const [form, setForm] = useState({
     from_base: '',
     to_base: '',
@@ -65,7 +66,14 @@ export default function TransfersPage() {
         end_date: filters.end_date || undefined,
       },
     });
-    setItems(res.data);
+    setItems(res.data.results);
+    setNextPage(res.data.next);
+  };
+
+  const loadMore = async () => {
+    const res = await api.get(nextPage);
+    setItems((prev) => [...prev, ...res.data.results]);
+    setNextPage(res.data.next);
   };
 
   const handleCreate = async (e) => {
@@ -289,6 +297,11 @@ export default function TransfersPage() {
             ))}
           </TableBody>
         </Table>
+        {nextPage && (
+          <Button sx={{ mt: 2 }} onClick={loadMore}>
+            Load more
+          </Button>
+        )}
       </Paper>
     </Box>
   );